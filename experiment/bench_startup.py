@@ -0,0 +1,83 @@
+"""
+Startup-time regression benchmark of the main.py CLI.
+
+Run it from the experiment directory:
+
+    python bench_startup.py [--repeat N] [--budget SECONDS]
+
+It fails if importing main.py loads one of the heavy analysis modules or
+if the median start of an orchestration command exceeds the budget.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+import typer
+
+# Modules only the analysis commands may load
+HEAVY_MODULES = ["pandas", "numpy", "scipy", "matplotlib", "seaborn"]
+
+COMMANDS = [
+    ["main.py", "--help"],
+    ["main.py", "build", "--help"],
+    ["main.py", "run", "ycsb", "--help"],
+    ["main.py", "run", "tpcc", "--help"],
+]
+
+
+def _loaded_heavy_modules() -> list[str]:
+    probe = (
+        "import sys, main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def _time_command(args: list[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args], check=True, capture_output=True
+        )
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(
+    repeat: int = typer.Option(5, help="Runs per command"),
+    budget: float = typer.Option(
+        1.0, help="Maximum median startup time in seconds"
+    ),
+):
+    failed = False
+
+    heavy = _loaded_heavy_modules()
+    if heavy:
+        print(f"❌ Importing main.py loads {', '.join(heavy)}")
+        failed = True
+    else:
+        print("✅ Importing main.py loads no analysis modules")
+
+    for args in COMMANDS:
+        median = _time_command(args, repeat)
+        ok = median <= budget
+        failed |= not ok
+        print(
+            f"{'✅' if ok else '❌'} {' '.join(args)}: {median:.3f}s "
+            f"(budget {budget:.3f}s)"
+        )
+
+    if failed:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,5 +1,5 @@
 resource "google_service_account" "gce_sa" {
-  account_id   = "container-vm-sa"
+  account_id   = "${var.name_prefix}container-vm-sa"
   display_name = "Service Account for Container VM"
 }
 
@@ -12,24 +12,26 @@ resource "google_project_iam_member" "artifact_registry_reader" {
 module "servers" {
   count           = var.cluster_size
   source          = "./modules/gce"
-  name            = "server-${count.index + 1}"
+  name            = "${var.name_prefix}server-${count.index + 1}"
   gce_spec        = "e2-standard-4"
   disk_type       = "pd-standard"
   gce_sa_email    = google_service_account.gce_sa.email
   cmd             = var.server_cmds[count.index]
   project_id      = var.project_id
   experiment_type = var.experiment_type
+  image_tag       = var.image_tag
   experiment_dir  = var.experiment_dir
 }
 
 module "client" {
   source          = "./modules/gce"
-  name            = "client"
+  name            = "${var.name_prefix}client"
   gce_spec        = "e2-standard-2"
   gce_sa_email    = google_service_account.gce_sa.email
   cmd             = var.client_cmd
   project_id      = var.project_id
   experiment_type = var.experiment_type
+  image_tag       = var.image_tag
   experiment_dir  = var.experiment_dir
 
   depends_on = [module.servers]
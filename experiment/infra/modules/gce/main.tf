@@ -3,7 +3,7 @@ module "container" {
   version = "~> 3.0"
 
   container = {
-    image   = "us-central1-docker.pkg.dev/${var.project_id}/docker-registry/crdb-experiment-${var.experiment_type}"
+    image   = "us-central1-docker.pkg.dev/${var.project_id}/docker-registry/crdb-experiment-${var.experiment_type}:${var.image_tag}"
     command = var.cmd
 
     volumeMounts = [
@@ -33,6 +33,12 @@ variable "experiment_type" {
   }
 }
 
+variable "image_tag" {
+  type        = string
+  default     = "latest"
+  description = "Tag of the experiment image"
+}
+
 variable "cmd" {
   type        = list(string)
   description = "The command to be executed in the container"
@@ -30,3 +30,14 @@ variable "experiment_type" {
   }
 }
 
+variable "name_prefix" {
+  type        = string
+  default     = ""
+  description = "Prefix of every resource name, so that several environments can exist side by side"
+}
+
+variable "image_tag" {
+  type        = string
+  default     = "latest"
+  description = "Tag of the experiment image to run, the content hash it was pushed with"
+}
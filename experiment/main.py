@@ -1,10 +1,12 @@
 import typer
+from typing import List, Optional
 import build as b
-import warmup as w
 import run
-import recovery as r
-import utils.analysis as a
+from utils.common import STABILITY_WINDOW, SeriesMode
 
+# NOTE: The analysis modules pull in pandas, scipy, matplotlib and seaborn.
+# They are imported inside the commands that need them so that the
+# orchestration commands start instantly.
 
 app = typer.Typer()
 app.add_typer(run.app, name="run")
@@ -20,18 +22,212 @@ def build():
 
 @app.command()
 def warmup():
-    w.compare_ycsb_warmup()
-    w.compare_tpcc_warmup()
+    import warmup as w
+    from utils.timeseries import NoDataError
+
+    try:
+        w.compare_ycsb_warmup()
+        w.compare_tpcc_warmup()
+    except NoDataError as e:
+        print(f"❌ {e}")
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def timeseries(
+    sources: List[str] = typer.Argument(
+        ..., help="Panels as name[:experiment_type[:run]]"
+    ),
+    operation: Optional[List[str]] = typer.Option(
+        None, help="Only these operations, repeatable"
+    ),
+    metric: List[str] = typer.Option(["avgt"], help="Repeatable"),
+    limit: Optional[float] = typer.Option(
+        None, help="Seconds after the first tick to stop at"
+    ),
+    points: int = typer.Option(1000, help="Points kept per line"),
+    mode: SeriesMode = typer.Option(
+        SeriesMode.AUTO,
+        help="lttb downsamples every run, band aggregates the runs of a "
+        "panel, auto picks band for panels of several runs",
+    ),
+    output: Optional[str] = typer.Option(
+        None, help="Path without extension, defaults to the first source"
+    ),
+    title: str = typer.Option("Throughput over Time"),
+    ylabel: str = typer.Option("Throughput (ops/s)"),
+    workers: int = typer.Option(
+        1, help="Processes used to parse the runs, 0 uses every core"
+    ),
+):
+    import utils.timeseries as ts
+
+    parsed = [ts.Source.parse(spec) for spec in sources]
+    if output is None:
+        output = f"./runs/{parsed[0].name}/results/timeseries"
+    try:
+        ts.run(
+            parsed,
+            output,
+            tuple(metric),
+            operation,
+            limit,
+            points,
+            mode,
+            title,
+            ylabel,
+            workers=workers,
+        )
+    except ts.NoDataError as e:
+        print(f"❌ {e}")
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def detect_warmup(
+    name: str,
+    sample_size: int,
+    workers: int = typer.Option(
+        1, help="Processes used to parse the runs, 0 uses every core"
+    ),
+):
+    import warmup as w
+
+    try:
+        w.detect_warmup(name, sample_size, workers)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def recovery(
+    name: str = typer.Argument("restart-remote"),
+    sample_size: Optional[int] = typer.Option(
+        None, help="Runs to extract, defaults to every run on disk"
+    ),
+    workers: int = typer.Option(
+        1, help="Processes used to scan the logs, 0 uses every core"
+    ),
+):
+    import recovery as r
+
+    try:
+        r.compare_recovery(name, sample_size, workers)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def analysis(
+    name: str,
+    sample_size: int,
+    cache: bool = typer.Option(
+        True, help="Reuse parsed client data cached next to each run"
+    ),
+    workers: int = typer.Option(
+        1, help="Processes used to parse the runs, 0 uses every core"
+    ),
+    hist_start: float = typer.Option(
+        0, help="Seconds after the first tick to start pooling histograms"
+    ),
+    hist_end: Optional[float] = typer.Option(
+        None, help="Seconds after the first tick to stop pooling histograms"
+    ),
+    resamples: int = typer.Option(
+        10_000, help="Bootstrap and permutation resamples, 0 disables them"
+    ),
+):
+    import utils.analysis as a
+
+    a.run(name, sample_size, cache, workers, (hist_start, hist_end), resamples)
+
+
+@app.command()
+def stability(
+    name: str,
+    sample_size: int,
+    window: float = typer.Option(
+        STABILITY_WINDOW, help="Length of the steady-state windows in seconds"
+    ),
+    cache: bool = typer.Option(
+        True, help="Reuse parsed client data cached next to each run"
+    ),
+    workers: int = typer.Option(
+        1, help="Processes used to parse the runs, 0 uses every core"
+    ),
+    resamples: int = typer.Option(
+        10_000, help="Bootstrap and permutation resamples, 0 disables them"
+    ),
+):
+    import utils.stability as s
+
+    s.run(name, sample_size, window, cache, workers, resamples)
 
 
 @app.command()
-def recovery():
-    r.compare_recovery()
+def ingest(
+    name: Optional[str] = typer.Argument(
+        None, help="Experiment to ingest, all experiments if omitted"
+    ),
+):
+    import utils.store as st
+
+    if name is None:
+        st.ingest_all()
+        return
+    try:
+        st.ingest(name)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        raise typer.Exit(code=1)
 
 
 @app.command()
-def analysis(name: str, sample_size: int):
-    a.run(name, sample_size)
+def compare(
+    metric: str = typer.Option("avgl", help="Final metric to compare"),
+    workload: Optional[str] = typer.Option(None),
+    workload_args: Optional[str] = typer.Option(None),
+    cluster_size: Optional[int] = typer.Option(None),
+    operation: Optional[str] = typer.Option(None),
+):
+    import utils.store as st
+
+    df = st.compare(metric, workload, workload_args, cluster_size, operation)
+    print(df.to_string(index=False))
+
+
+@app.command()
+def timeline(
+    name: str,
+    run: int,
+    experiment_type: str = typer.Argument("baseline"),
+    around: str = typer.Option(
+        "restart",
+        help="'restart' or seconds since the first tick of the client",
+    ),
+    window: float = typer.Option(5.0, help="Seconds on either side"),
+    event: Optional[str] = typer.Option(
+        None, help="Only events of this type, e.g. catchup or lease"
+    ),
+):
+    import utils.timeline as tl
+    from utils.common import ExperimentType
+
+    exp_type = ExperimentType(experiment_type)
+    logs_dir = tl.logs_dir(name, run, exp_type)
+    if around == "restart":
+        at = tl.restart_time(logs_dir)
+        if at is None:
+            print(f"❌ No node start found in {logs_dir}")
+            raise typer.Exit(code=1)
+    else:
+        at = tl.client_time(name, run, exp_type, float(around))
+
+    df = tl.events_near(logs_dir, at, window, event)
+    print(f"📏 {len(df)} events within {window}s of {at.isoformat()}")
+    print(df.drop(columns=["file", "offset"]).to_string(index=False))
 
 
 if __name__ == "__main__":
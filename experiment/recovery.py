@@ -1,16 +1,26 @@
 import pandas as pd
 import numpy as np
 from scipy.stats import shapiro, ttest_ind, mannwhitneyu
-import matplotlib.pyplot as plt
 import seaborn as sns
-from typing import Tuple
+from typing import Optional, Tuple
+from utils import resampling
+from utils.cockroach_log import extract_recovery
+from utils.common import run_numbers
+from utils.plotting import plt, save
 
 
 def load_data(
-    filepath: str = "./runs/restart-remote/results/recovery_times.csv",
+    name: str = "restart-remote",
+    sample_size: Optional[int] = None,
+    workers: int = 1,
 ) -> pd.DataFrame:
-    """Load recovery times data from CSV."""
-    return pd.read_csv(filepath)
+    """
+    Extract recovery times from the logs of the runs, or load them from the
+    results CSV of an experiment whose runs are no longer on disk.
+    """
+    if sample_size or run_numbers(name):
+        return extract_recovery(name, sample_size, workers)
+    return pd.read_csv(f"./runs/{name}/results/recovery_times.csv")
 
 
 def select_relevant_columns(
@@ -118,13 +128,38 @@ def perform_tests(baseline: pd.Series, thesis: pd.Series) -> None:
         else:
             print("  ❌ No statistically significant difference.")
 
+    print_resampling(baseline, thesis)
+
+
+def print_resampling(baseline: pd.Series, thesis: pd.Series) -> None:
+    """
+    Print bootstrap confidence intervals of the thesis minus baseline
+    differences and the one-sided permutation p-value (thesis > baseline).
+    """
+    x = baseline.to_numpy(dtype=float)[None, :]
+    y = thesis.to_numpy(dtype=float)[None, :]
+    boot = resampling.bootstrap(x, y)
+    p_val = resampling.permutation_test(x, y, alternative="greater")[0]
+    level = int(resampling.CONFIDENCE * 100)
+
+    print(f"\nResampling ({resampling.N_RESAMPLES} resamples):")
+    for stat in ("mean", "median"):
+        print(
+            f"  {stat.capitalize()} difference (thesis - baseline): "
+            f"{boot[f'{stat}_diff'][0]:.4f} "
+            f"[{level}% CI {boot[f'{stat}_diff_ci_low'][0]:.4f}, "
+            f"{boot[f'{stat}_diff_ci_high'][0]:.4f}]"
+        )
+    print(f"  Permutation P-value (thesis > baseline): {p_val:.4f}")
+
 
-def plot_recovery_boxplots(df: pd.DataFrame) -> None:
+def plot_recovery_boxplots(df: pd.DataFrame, output_dir: str) -> None:
     """
     Print descriptive stats and plot boxplots comparing baseline and thesis recovery times.
 
     Args:
         df: DataFrame containing data
+        output_dir: Directory the plot is saved to
     """
     data = df.copy()
 
@@ -154,27 +189,25 @@ def plot_recovery_boxplots(df: pd.DataFrame) -> None:
         }
     )
 
-    plt.figure(figsize=(8, 6))
-    sns.boxplot(x="Method", y="Recovery_per_Replica", data=df_long)
-    plt.title("Comparison of Recovery Time per Replica")
-    plt.ylabel("Recovery Time per Replica (ms)")
-    plt.xlabel("")
-    plt.savefig(
-        "./runs/restart-remote/results/recovery_comparison.pdf",
-        dpi=500,
-        format="pdf",
-        bbox_inches="tight",
-    )
-    plt.show()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.boxplot(x="Method", y="Recovery_per_Replica", data=df_long, ax=ax)
+    ax.set_title("Comparison of Recovery Time per Replica")
+    ax.set_ylabel("Recovery Time per Replica (ms)")
+    ax.set_xlabel("")
+    save(fig, f"{output_dir}/recovery_comparison", dpi=500)
 
 
-def compare_recovery() -> None:
+def compare_recovery(
+    name: str = "restart-remote",
+    sample_size: Optional[int] = None,
+    workers: int = 1,
+) -> None:
     """Load data, perform tests and plot results for both scenarios."""
-    df = load_data()
+    df = load_data(name, sample_size, workers)
 
     baseline, thesis = select_relevant_columns(df, select_all=True)
     perform_tests(baseline, thesis)
-    plot_recovery_boxplots(df)
+    plot_recovery_boxplots(df, f"./runs/{name}/results")
 
 
 if __name__ == "__main__":
@@ -2,13 +2,69 @@ import typer
 
 # from utils import experiment
 from enum import Enum
+from typing import Optional
 from utils.common import DeploymentType
+from utils.experiment import capacity as cap
+from utils.experiment import sweep as sw
 from utils.experiment.runner import ExperimentRunner
 from utils.experiment.models import ExperimentConfig
-
+from utils.experiment.ramps import DEFAULT_RAMPS
 
 app = typer.Typer()
 
+RAMP_OPTION = typer.Option(
+    None, help="Ramp-up duration, e.g. 0s to measure the warm-up"
+)
+AUTO_RAMP_OPTION = typer.Option(
+    False,
+    "--auto-ramp",
+    help="Use the ramp found by 'detect-warmup' for this workload and "
+    "cluster size if there is one",
+)
+SEQUENTIAL_OPTION = typer.Option(
+    False,
+    "--sequential",
+    help="Analyze after every pair and stop early once the result is "
+    "conclusive, running at most sample_size pairs",
+)
+
+CONCURRENT_OPTION = typer.Option(
+    False,
+    "--concurrent",
+    help="Remote only: run baseline and thesis side by side in separate "
+    "environments instead of one after the other",
+)
+
+POOLED_OPTION = typer.Option(
+    False,
+    "--pooled",
+    help="Remote only: provision the VMs once and reuse them for every "
+    "run instead of applying and destroying them per run",
+)
+
+FIXTURES_OPTION = typer.Option(
+    False,
+    "--fixtures",
+    help="Local only: initialize the workload once per image, save the "
+    "stores and restore them before every run instead of loading the data "
+    "again",
+)
+
+PARALLEL_OPTION = typer.Option(
+    1,
+    "--parallel",
+    min=0,
+    help="Local only: clusters to run side by side, each on its own cores, "
+    "memory, network and ports. 0 fits as many as the cores allow",
+)
+
+RESUME_OPTION = typer.Option(
+    False,
+    "--resume",
+    help="Continue an interrupted experiment from its journal: skip the "
+    "completed runs and redo the others with their recorded seeds",
+)
+
 
 class Workload(Enum):
     A = "A"
@@ -30,10 +86,17 @@ def ycsb(
     cluster_size: int,
     duration: str,
     ycsb_workload: Workload,
+    ramp: Optional[str] = RAMP_OPTION,
+    auto_ramp: bool = AUTO_RAMP_OPTION,
+    sequential: bool = SEQUENTIAL_OPTION,
+    concurrent: bool = CONCURRENT_OPTION,
+    pooled: bool = POOLED_OPTION,
+    fixtures: bool = FIXTURES_OPTION,
+    parallel: int = PARALLEL_OPTION,
+    resume: bool = RESUME_OPTION,
 ):
     workload = "ycsb"
     workload_args = f"--workload={str(ycsb_workload)}"
-    ramp = "400s"
 
     config = ExperimentConfig(
         name,
@@ -43,9 +106,15 @@ def ycsb(
         workload,
         workload_args,
         duration,
-        ramp,
+        ramp or DEFAULT_RAMPS[workload],
+        auto_ramp=auto_ramp,
+        sequential=sequential,
+        concurrent=concurrent,
+        pooled=pooled,
+        fixtures=fixtures,
+        parallel=parallel,
     )
-    runner = ExperimentRunner(config)
+    runner = ExperimentRunner(config, resume)
     runner.run()
 
 
@@ -56,10 +125,17 @@ def restart(
     sample_size: int,
     cluster_size: int,
     duration: str,
+    ramp: Optional[str] = RAMP_OPTION,
+    auto_ramp: bool = AUTO_RAMP_OPTION,
+    sequential: bool = SEQUENTIAL_OPTION,
+    concurrent: bool = CONCURRENT_OPTION,
+    pooled: bool = POOLED_OPTION,
+    fixtures: bool = FIXTURES_OPTION,
+    parallel: int = PARALLEL_OPTION,
+    resume: bool = RESUME_OPTION,
 ):
     workload = "ycsb"
     workload_args = "--workload=A"
-    ramp = "400s"
 
     config = ExperimentConfig(
         name,
@@ -69,10 +145,16 @@ def restart(
         workload,
         workload_args,
         duration,
-        ramp,
+        ramp or DEFAULT_RAMPS[workload],
         True,
+        auto_ramp,
+        sequential,
+        concurrent,
+        pooled,
+        fixtures,
+        parallel,
     )
-    runner = ExperimentRunner(config)
+    runner = ExperimentRunner(config, resume)
     runner.run()
 
 
@@ -84,10 +166,17 @@ def tpcc(
     cluster_size: int,
     duration: str,
     warehouses: int,
+    ramp: Optional[str] = RAMP_OPTION,
+    auto_ramp: bool = AUTO_RAMP_OPTION,
+    sequential: bool = SEQUENTIAL_OPTION,
+    concurrent: bool = CONCURRENT_OPTION,
+    pooled: bool = POOLED_OPTION,
+    fixtures: bool = FIXTURES_OPTION,
+    parallel: int = PARALLEL_OPTION,
+    resume: bool = RESUME_OPTION,
 ):
     workload = "tpcc"
     workload_args = f"--warehouses={warehouses}"
-    ramp = "180s"
 
     config = ExperimentConfig(
         name,
@@ -97,11 +186,88 @@ def tpcc(
         workload,
         workload_args,
         duration,
-        ramp,
+        ramp or DEFAULT_RAMPS[workload],
+        auto_ramp=auto_ramp,
+        sequential=sequential,
+        concurrent=concurrent,
+        pooled=pooled,
+        fixtures=fixtures,
+        parallel=parallel,
     )
-    runner = ExperimentRunner(config)
+    runner = ExperimentRunner(config, resume)
     runner.run()
 
 
+@app.command()
+def sweep(
+    plan: str = typer.Argument(..., help="TOML plan of the campaign"),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Skip the completed experiments of the campaign and continue "
+        "the others from their journals",
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only list the experiments of the plan"
+    ),
+):
+    failed = sw.run(plan, resume, dry_run)
+    if failed:
+        print(f"❌ Failed: {', '.join(failed)}")
+        raise typer.Exit(1)
+
+
+@app.command()
+def capacity(
+    deployment_type: DeploymentType,
+    name: str,
+    cluster_size: int,
+    workload: str,
+    slo: float = typer.Option(
+        ..., help="Latency objective in ms at the quantile"
+    ),
+    workload_args: str = typer.Option(
+        "", help="Args of the workload, e.g. --workload=B"
+    ),
+    quantile: str = typer.Option("p99", help="p50, p90, p95, p99, ..."),
+    knob: cap.Knob = typer.Option(cap.Knob.MAX_RATE, help="Level to search"),
+    start: int = typer.Option(
+        1000, help="First level probed, in ops/s or workers"
+    ),
+    duration: str = typer.Option("60s", help="Duration of a probe"),
+    ramp: str = typer.Option(
+        "10s",
+        help="Ramp of a probe, during which the workload records no "
+        "histograms",
+    ),
+    max_probes: int = typer.Option(12, help="Probes per experiment type"),
+    tolerance: float = typer.Option(
+        0.05, help="Precision of the knee relative to its level"
+    ),
+    fixtures: bool = FIXTURES_OPTION,
+    pooled: bool = POOLED_OPTION,
+):
+    """
+    Search the highest load baseline and thesis sustain under the SLO.
+    """
+    config = ExperimentConfig(
+        name,
+        deployment_type,
+        max_probes,
+        cluster_size,
+        workload,
+        workload_args,
+        duration,
+        ramp,
+        pooled=pooled,
+        fixtures=fixtures,
+    )
+    try:
+        cap.search(config, slo, knob, start, quantile, max_probes, tolerance)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise typer.Exit(1)
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    """Run in an empty directory, the experiments live under ./runs."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
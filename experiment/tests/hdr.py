@@ -0,0 +1,35 @@
+"""Synthetic hdrhistograms.json files as `cockroach workload` writes them."""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+START = datetime(2025, 5, 1, tzinfo=timezone.utc)
+LOWEST = 1
+HIGHEST = 100_000_000_000
+SIG_FIGS = 1
+
+
+def tick(name: str, second: float, counts: list[int]) -> dict:
+    now = START + timedelta(seconds=second)
+    return {
+        "Name": name,
+        "Hist": {
+            "LowestTrackableValue": LOWEST,
+            "HighestTrackableValue": HIGHEST,
+            "SignificantFigures": SIG_FIGS,
+            "Counts": counts,
+        },
+        "Elapsed": 1_000_000_000,
+        "Now": now.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+    }
+
+
+def write(output_dir: str, ticks: list[dict]) -> str:
+    """Write the ticks to the data directory of a run's outputs."""
+    os.makedirs(f"{output_dir}/data", exist_ok=True)
+    path = f"{output_dir}/data/hdrhistograms.json"
+    with open(path, "w") as f:
+        for entry in ticks:
+            f.write(json.dumps(entry) + "\n")
+    return path
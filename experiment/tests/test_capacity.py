@@ -0,0 +1,32 @@
+import math
+import hdr
+from utils.experiment import capacity
+from utils.histograms import Histogram
+
+COUNTS = [0, 0, 5, 10, 3, 2]
+
+
+def test_measure_covers_every_tick(tmp_path):
+    # The workload writes ticks from the end of the ramp on, the first one
+    # already counts
+    hdr.write(
+        tmp_path,
+        [
+            hdr.tick(op, second, COUNTS)
+            for second in range(10)
+            for op in ("read", "update")
+        ],
+    )
+
+    throughput, latency = capacity.measure(tmp_path, "p99")
+
+    # Identical ticks pool into the same quantiles as a single one
+    pooled = Histogram.from_snapshot(hdr.tick("read", 0, COUNTS)["Hist"])
+    assert throughput == 2 * 10 * sum(COUNTS) / 10
+    assert latency == pooled.value_at_quantiles([0.99])[0]
+
+
+def test_measure_without_operations(tmp_path):
+    hdr.write(tmp_path, [hdr.tick("read", 0, [0, 0, 0])])
+
+    assert capacity.measure(tmp_path, "p99") == (0.0, math.inf)
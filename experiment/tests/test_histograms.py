@@ -0,0 +1,26 @@
+import os
+import hdr
+from utils import histograms
+from utils.common import ExperimentType, get_local_output_dir
+
+COUNTS = [0, 0, 5, 10, 3, 1]
+EMPTY = [0] * len(COUNTS)
+
+
+def test_run_skips_operations_without_requests(in_tmp):
+    for exp_type in ExperimentType:
+        hdr.write(
+            get_local_output_dir("exp", 1, exp_type),
+            [
+                hdr.tick(op, second, counts)
+                for second in range(3)
+                for op, counts in (("read", COUNTS), ("scan", EMPTY))
+            ],
+        )
+    os.makedirs("results")
+
+    jobs = histograms.run("exp", 1, "results")
+
+    assert [job.params["op"] for job in jobs] == ["read"]
+    assert os.path.exists("results/tail-read.csv")
+    assert not os.path.exists("results/tail-scan.csv")
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+from importlib.util import find_spec
+from typing import Callable
+import pandas as pd
+
+# Bump whenever a loader changes the shape of the frames it returns so that
+# stale cache entries are dropped
+CACHE_VERSION = 1
+CACHE_DIR = ".cache"
+
+# Parquet needs pyarrow, fall back to pickles when it is not installed
+_PARQUET = find_spec("pyarrow") is not None
+_SUFFIX = ".parquet" if _PARQUET else ".pkl"
+
+
+def _content_hash(filepath: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_meta(meta_path: str) -> dict:
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(meta_path: str, meta: dict):
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def _read_frame(data_path: str) -> pd.DataFrame:
+    if _PARQUET:
+        return pd.read_parquet(data_path)
+    return pd.read_pickle(data_path)
+
+
+def _write_frame(data_path: str, df: pd.DataFrame):
+    tmp_path = f"{data_path}.tmp"
+    if _PARQUET:
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, data_path)
+
+
+def cached_frame(
+    source: str, kind: str, loader: Callable[[str], pd.DataFrame]
+) -> pd.DataFrame:
+    """
+    Return `loader(source)`, served from a columnar cache next to `source`.
+
+    Entries are keyed by the path, size, mtime and content hash of the
+    source. If only the mtime changed the content hash decides, so touching
+    a file does not force a reparse.
+    """
+    cache_dir = os.path.join(os.path.dirname(source), CACHE_DIR)
+    base = os.path.join(cache_dir, f"{os.path.basename(source)}.{kind}")
+    meta_path = f"{base}.json"
+    data_path = f"{base}{_SUFFIX}"
+
+    stat = os.stat(source)
+    fingerprint = {
+        "version": CACHE_VERSION,
+        "path": os.path.abspath(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+    meta = _read_meta(meta_path)
+    digest = None
+    if meta and os.path.exists(data_path):
+        cached = {k: meta.get(k) for k in fingerprint}
+        if cached == fingerprint:
+            return _read_frame(data_path)
+
+        stale = dict(cached, mtime_ns=stat.st_mtime_ns)
+        if stale == fingerprint:
+            digest = _content_hash(source)
+            if digest == meta.get("hash"):
+                _write_meta(meta_path, dict(fingerprint, hash=digest))
+                return _read_frame(data_path)
+
+    digest = digest or _content_hash(source)
+    df = loader(source)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_frame(data_path, df)
+    _write_meta(meta_path, dict(fingerprint, hash=digest))
+    return df
@@ -0,0 +1,88 @@
+import json
+import re
+from array import array
+from datetime import datetime
+from typing import Iterator, Optional
+import numpy as np
+import pandas as pd
+
+# Numeric fields written by `cockroach workload run
+# --display-format=incremental-json`. Everything except `avgl` describes the
+# current tick, `avgl` is the cumulative throughput since the start.
+NUMERIC_COLUMNS = ("errs", "avgt", "avgl", "p50l", "p95l", "p99l", "maxl")
+
+# RFC3339Nano timestamps carry up to nine fractional digits, datetime only
+# understands six
+_FRACTION = re.compile(r"(\.\d{6})\d+")
+
+
+def parse_time(value: str) -> datetime:
+    value = _FRACTION.sub(r"\1", value.replace("Z", "+00:00"))
+    return datetime.fromisoformat(value)
+
+
+def iter_records(filepath: str) -> Iterator[dict]:
+    """Lazily yield every JSON record of a client.txt file."""
+    with open(filepath, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("{") and line.endswith("}"):
+                yield json.loads(line)
+
+
+def iter_timed_records(
+    filepath: str, limit: Optional[float] = None
+) -> Iterator[tuple[float, dict]]:
+    """
+    Yield (elapsed seconds, record) pairs relative to the first record.
+
+    The workload writes its ticks in chronological order, so reading stops
+    as soon as the first record at or past `limit` seconds is seen.
+    """
+    start = None
+    for record in iter_records(filepath):
+        time = parse_time(record["time"])
+        if start is None:
+            start = time
+        elapsed = (time - start).total_seconds()
+        if limit is not None and elapsed >= limit:
+            return
+        yield elapsed, record
+
+
+def read_frame(filepath: str, limit: Optional[float] = None) -> pd.DataFrame:
+    """
+    Read the full time series of a client.txt file into typed columns.
+
+    The `time` column holds the seconds elapsed since the first record.
+    """
+    times = array("d")
+    types = []
+    columns = {col: array("d") for col in NUMERIC_COLUMNS}
+
+    for elapsed, record in iter_timed_records(filepath, limit):
+        times.append(elapsed)
+        types.append(record["type"])
+        for col, values in columns.items():
+            values.append(record.get(col, float("nan")))
+
+    df = pd.DataFrame({"time": np.asarray(times)})
+    for col, values in columns.items():
+        df[col] = np.asarray(values)
+    df["type"] = types
+    return df
+
+
+def read_last_rows(filepath: str) -> pd.DataFrame:
+    """
+    Return the last record of every operation type.
+
+    Only one record per type is kept in memory, the rows are ordered like
+    `df.groupby("type").tail(1)` would order them.
+    """
+    last = {}
+    for i, record in enumerate(iter_records(filepath)):
+        last[record["type"]] = (i, record)
+
+    rows = [record for _, record in sorted(last.values(), key=lambda r: r[0])]
+    return pd.DataFrame(rows)
@@ -0,0 +1,307 @@
+import glob
+import mmap
+import os
+import re
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+import pandas as pd
+from .common import (
+    DeploymentType,
+    ExperimentType,
+    RESTARTED_NODE,
+    get_local_output_dir,
+    map_in_parallel,
+    run_numbers,
+)
+from .experiment.models import ExperimentConfig
+
+# Header of a crdb-v2 log entry:
+#   I250501 12:00:01.123456 123 kv/kvserver/store.go:1234 ⋮ [T1,n3,s3,r45/2] 99
+# Lines that continue a multi-line entry repeat the header and mark the
+# message with `+`.
+HEADER = re.compile(
+    rb"(?P<severity>[IWEF])(?P<time>\d{6} \d{2}:\d{2}:\d{2}\.\d{6}) +"
+    rb"\d+ +(?P<source>\S+) +(?:\xe2\x8b\xae +)?(?:\[(?P<tags>[^\]]*)\])?"
+    rb"(?: +\d+ ?(?P<continued>[+|])?)?"
+)
+RANGE_TAG = re.compile(rb"(?:^|,)r(\d+)/")
+
+# Events of a node restart: literal markers that are searched for in the
+# whole file, and the pattern a line holding a marker has to match. Add
+# thesis-specific messages here.
+EVENT_MARKERS = {
+    "start": (b"starting cockroach node",),
+    "ready": (b"node startup completed",),
+    "catchup": (b"snapshot", b"caught up"),
+}
+EVENT_PATTERNS = {
+    "start": re.compile(rb"starting cockroach node"),
+    "ready": re.compile(rb"node startup completed"),
+    "catchup": re.compile(rb"applied \w+ snapshot|caught up"),
+}
+
+
+def parse_timestamp(value: bytes) -> datetime:
+    """Parse a `yymmdd hh:mm:ss.ffffff` header timestamp, which is in UTC."""
+    # Slicing is several times faster than strptime on every entry
+    return datetime(
+        2000 + int(value[0:2]),
+        int(value[2:4]),
+        int(value[4:6]),
+        int(value[7:9]),
+        int(value[10:12]),
+        int(value[13:15]),
+        int(value[16:22]),
+        tzinfo=timezone.utc,
+    )
+
+
+def range_id(tags: Optional[bytes]) -> Optional[int]:
+    match = RANGE_TAG.search(tags or b"")
+    return int(match.group(1)) if match else None
+
+
+def _line_at(buf, pos: int) -> tuple[int, bytes]:
+    start = buf.rfind(b"\n", 0, pos) + 1
+    end = buf.find(b"\n", pos)
+    if end == -1:
+        end = len(buf)
+    return start, buf[start:end]
+
+
+def _find_all(buf, marker: bytes) -> Iterator[int]:
+    pos = buf.find(marker)
+    while pos != -1:
+        yield pos
+        pos = buf.find(marker, pos + len(marker))
+
+
+def scan_events(filepath: str) -> Iterator[dict]:
+    """
+    Yield the restart events of one log file in file order.
+
+    The memory-mapped file is searched for the literal markers, which runs
+    at memory speed, and only the few lines holding one are decoded.
+    Matches on continuation lines of a multi-line entry are attributed to
+    the header of that entry.
+    """
+    if os.path.getsize(filepath) == 0:
+        return
+
+    with open(filepath, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buf:
+        hits = {}
+        for event, markers in EVENT_MARKERS.items():
+            for marker in markers:
+                for pos in _find_all(buf, marker):
+                    start, line = _line_at(buf, pos)
+                    if start not in hits and EVENT_PATTERNS[event].search(
+                        line
+                    ):
+                        hits[start] = (event, line)
+
+        for start in sorted(hits):
+            event, line = hits[start]
+            header = HEADER.match(line)
+            while header is None and start > 0:
+                start, line = _line_at(buf, start - 1)
+                header = HEADER.match(line)
+            if header is None:
+                continue
+
+            yield {
+                "time": parse_timestamp(header["time"]),
+                "event": event,
+                "range_id": range_id(header["tags"]),
+                "severity": header["severity"].decode(),
+                "file": filepath,
+                "offset": start,
+            }
+
+
+def iter_entries(filepath: str, start: int = 0) -> Iterator[dict]:
+    """
+    Stream the entries of one log file in file order, beginning at the byte
+    offset `start`. The continuation lines of a multi-line entry are folded
+    into its message.
+    """
+    entry = None
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            header = HEADER.match(line)
+            if header is None or header["continued"]:
+                if entry is not None:
+                    message = line[header.end() :] if header else line
+                    entry["message"] += b"\n" + message.rstrip()
+                offset += len(line)
+                continue
+
+            if entry is not None:
+                yield _decode(entry)
+            entry = {
+                "time": parse_timestamp(header["time"]),
+                "severity": header["severity"].decode(),
+                "source": header["source"].decode(),
+                "range_id": range_id(header["tags"]),
+                "message": line[header.end() :].strip(),
+                "file": filepath,
+                "offset": offset,
+            }
+            offset += len(line)
+
+    if entry is not None:
+        yield _decode(entry)
+
+
+def _decode(entry: dict) -> dict:
+    entry["message"] = entry["message"].decode(errors="replace")
+    return entry
+
+
+def log_files(directory: str) -> list[str]:
+    """
+    Every cockroach log of a node directory, including rotated files, with
+    the `cockroach.log` symlink resolved to the file it points at.
+    """
+    files = {}
+    for path in glob.glob(f"{directory}/cockroach*.log"):
+        files.setdefault(os.path.realpath(path), path)
+    # Rotated files embed their creation time, so name order is time order
+    return sorted(files)
+
+
+def recovery_metrics(files: list[str]) -> dict:
+    """
+    Recovery of a restarted node from its logs.
+
+    The last node start is the restart. A replica counts as recovered at its
+    last catch-up event after the restart. `recovery_per_replica` is the
+    time from the restart until the last replica recovered, in ms, divided
+    by the number of recovered replicas.
+    """
+    events = sorted(
+        (event for path in files for event in scan_events(path)),
+        key=lambda e: e["time"],
+    )
+    metrics = {
+        "restart": None,
+        "ready_ms": None,
+        "replicas": 0,
+        "recovery_ms": None,
+        "recovery_per_replica": None,
+    }
+    starts = [e["time"] for e in events if e["event"] == "start"]
+    if not starts:
+        return metrics
+
+    restart = starts[-1]
+    recovered = {}
+    for event in events:
+        if event["time"] < restart or event["event"] != "catchup":
+            continue
+        # A catch-up without a range tag cannot be told apart from others
+        if event["range_id"] is None:
+            continue
+        recovered[event["range_id"]] = event["time"]
+    ready = next(
+        (
+            e["time"]
+            for e in events
+            if e["event"] == "ready" and e["time"] >= restart
+        ),
+        None,
+    )
+
+    metrics["restart"] = restart
+    metrics["replicas"] = len(recovered)
+    if ready:
+        metrics["ready_ms"] = _ms(ready - restart)
+    if recovered:
+        recovery = _ms(max(recovered.values()) - restart)
+        metrics["recovery_ms"] = recovery
+        metrics["recovery_per_replica"] = recovery / len(recovered)
+    return metrics
+
+
+def _ms(delta) -> float:
+    return delta.total_seconds() * 1000
+
+
+def node_log_dir(logs_dir: str, node: str) -> Optional[str]:
+    """
+    Directory holding the logs of a node: local runs keep one directory per
+    server, remote runs only download the restarted node's logs.
+    """
+    node_dir = f"{logs_dir}/{node}"
+    if os.path.isdir(node_dir):
+        return node_dir
+    if glob.glob(f"{logs_dir}/cockroach*.log"):
+        return logs_dir
+    return None
+
+
+def _restarted_node(name: str) -> str:
+    try:
+        deployment_type = ExperimentConfig.load(name).deployment_type
+    except FileNotFoundError:
+        # Experiments from before configs were recorded were all remote
+        deployment_type = DeploymentType.REMOTE
+    return RESTARTED_NODE[deployment_type]
+
+
+def _extract_run(
+    name: str, run: int, exp_type: ExperimentType, node: str
+) -> dict:
+    logs_dir = f"{get_local_output_dir(name, run, exp_type)}/logs"
+    directory = node_log_dir(logs_dir, node)
+    files = log_files(directory) if directory else []
+    if not files:
+        print(f"⚠️ No cockroach logs of {node} in {logs_dir}")
+    return {
+        "run": run,
+        "experiment_type": str(exp_type),
+        **recovery_metrics(files),
+    }
+
+
+def extract_recovery(
+    name: str, sample_size: Optional[int] = None, workers: int = 1
+) -> pd.DataFrame:
+    """
+    Recovery metrics of the restarted node of every run, written to
+    results/recovery_events.csv and, one row per run with baseline and
+    thesis side by side, to results/recovery_times.csv.
+    """
+    on_disk = run_numbers(name)
+    runs = range(1, sample_size + 1) if sample_size else on_disk
+    if not set(runs) & set(on_disk):
+        raise FileNotFoundError(f"No runs of {name} in ./runs/{name}")
+    node = _restarted_node(name)
+    tasks = [
+        (name, run, exp_type, node)
+        for run in runs
+        for exp_type in ExperimentType
+    ]
+    events = pd.DataFrame(map_in_parallel(_extract_run, tasks, workers))
+
+    times = (
+        events.pivot(
+            index="run",
+            columns="experiment_type",
+            values="recovery_per_replica",
+        )
+        .astype(float)
+        .add_prefix("recovery_per_replica_")
+    )
+    times.columns.name = None
+
+    output_dir = f"./runs/{name}/results"
+    os.makedirs(output_dir, exist_ok=True)
+    events.to_csv(f"{output_dir}/recovery_events.csv", index=False)
+    times.to_csv(f"{output_dir}/recovery_times.csv")
+
+    print(f"✅ Extracted recovery of {len(times)} runs of {name}")
+    return times.reset_index()
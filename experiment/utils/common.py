@@ -1,5 +1,9 @@
+import glob
+import os
+import re
 from enum import Enum
 from .experiment.config import PROJECT_ID
+from concurrent.futures import ProcessPoolExecutor
 from multiprocessing import Process
 
 SQL_PORT = 26257
@@ -15,6 +19,9 @@ class ExperimentType(str, Enum):
         return self.value
 
 
+EXPERIMENT_TYPE_MAP = {"baseline": "CRDB", "thesis": "DO-CRDB"}
+
+
 class DeploymentType(str, Enum):
     LOCAL = "local"
     REMOTE = "remote"
@@ -23,24 +30,63 @@ class DeploymentType(str, Enum):
         return self.value
 
 
+class SeriesMode(str, Enum):
+    """How the time-series panels turn runs into lines."""
+
+    AUTO = "auto"
+    LTTB = "lttb"
+    BAND = "band"
+
+    def __str__(self):
+        return self.value
+
+
+# Length of the windows the steady state is cut into, in seconds
+STABILITY_WINDOW = 10
+
+# Server restarted by the restart experiments of each deployment
+RESTARTED_NODE = {
+    DeploymentType.LOCAL: "server-2",
+    DeploymentType.REMOTE: "server-3",
+}
+
+
 def get_local_output_dir(name: str, run: int, exp_type: ExperimentType):
     return f"./runs/{name}/run-{run}/experiment-{str(exp_type)}"
 
 
+_RUN_DIR = re.compile(r"run-(\d+)$")
+
+
+def run_numbers(name: str) -> list[int]:
+    """Numbers of the runs of an experiment that exist on disk."""
+    runs = []
+    for path in glob.glob(f"./runs/{name}/run-*"):
+        match = _RUN_DIR.search(path)
+        if match:
+            runs.append(int(match.group(1)))
+    return sorted(runs)
+
+
 def create_remote_host(name: str):
     return f"{name}.us-central1-a.c.{PROJECT_ID}.internal"
 
 
-def create_join_str(deployment_type: DeploymentType, cluster_size: int) -> str:
+def create_join_str(
+    deployment_type: DeploymentType, cluster_size: int, prefix: str = ""
+) -> str:
     match deployment_type:
         case DeploymentType.LOCAL:
             return ",".join(
-                [f"server-{i}:{SQL_PORT}" for i in range(1, cluster_size + 1)]
+                [
+                    f"{prefix}server-{i}:{SQL_PORT}"
+                    for i in range(1, cluster_size + 1)
+                ]
             )
         case DeploymentType.REMOTE:
             return ",".join(
                 [
-                    f"{create_remote_host(f'server-{i}')}:{SQL_PORT}"
+                    f"{create_remote_host(f'{prefix}server-{i}')}:{SQL_PORT}"
                     for i in range(1, cluster_size + 1)
                 ]
             )
@@ -56,6 +102,22 @@ def runInParallel(*fns):
         p.join()
 
 
+def map_in_parallel(fn, tasks: list[tuple], workers: int = 1) -> list:
+    """
+    Call `fn(*task)` for every task, in a process pool when more than one
+    worker is requested (0 uses every core). Results keep the task order.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        return [fn(*task) for task in tasks]
+
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, *zip(*tasks), chunksize=chunksize))
+
+
 def convert_duration(duration: str):
     return (
         int(duration[:-1])
@@ -0,0 +1,244 @@
+import csv
+import math
+import os
+from enum import Enum
+from typing import Optional
+from .models import ExperimentConfig
+from .runner import ExperimentRunner
+from ..common import ExperimentType
+
+# Share of the offered rate a probe has to achieve, below it the cluster is
+# saturated whatever the latency
+SATURATION = 0.95
+# Seconds covered by every tick of hdrhistograms.json
+TICK = 1.0
+
+
+class Knob(str, Enum):
+    MAX_RATE = "max-rate"
+    CONCURRENCY = "concurrency"
+
+    def __str__(self):
+        return self.value
+
+
+# Knobs a workload generator does not have, e.g. tpcc sizes its load with
+# --workers
+UNSUPPORTED = {"tpcc": {Knob.CONCURRENCY}}
+
+
+class KneeSearch:
+    """
+    Highest level of a knob that meets the SLO. The level doubles from
+    `start` until a probe fails, then the gap between the best passing and
+    the lowest failing level is bisected until it is within `tolerance` of
+    the failing one.
+    """
+
+    def __init__(
+        self, start: int, growth: float = 2.0, tolerance: float = 0.05
+    ):
+        self.start = start
+        self.growth = growth
+        self.tolerance = tolerance
+        self.passed: Optional[int] = None
+        self.failed: Optional[int] = None
+
+    def observe(self, level: int, passed: bool):
+        if passed:
+            self.passed = max(self.passed or 0, level)
+        else:
+            self.failed = min(self.failed or level, level)
+
+    def propose(self) -> Optional[int]:
+        """The next level to probe, None once the knee is found."""
+        if self.failed is None:
+            if self.passed is None:
+                return self.start
+            return math.ceil(self.passed * self.growth)
+
+        low = self.passed or 0
+        if self.failed - low <= max(1, self.tolerance * self.failed):
+            return None
+        return (low + self.failed) // 2
+
+
+def measure(output_dir: str, quantile: str) -> tuple[float, float]:
+    """
+    Throughput in ops/s and latency in ms at `quantile` of a probe, over
+    every operation of its histograms. The workload only writes them once
+    the ramp is over.
+    """
+    # The histograms need numpy, only import them once a probe finished
+    from ..histograms import QUANTILES, iter_ticks
+
+    pooled = None
+    first = last = None
+    for _, elapsed, hist in iter_ticks(
+        f"{output_dir}/data/hdrhistograms.json"
+    ):
+        pooled = hist if pooled is None else pooled.merge(hist)
+        first = elapsed if first is None else first
+        last = elapsed
+
+    if pooled is None or pooled.total == 0:
+        return 0.0, math.inf
+    throughput = pooled.total / (last - first + TICK)
+    latency = float(pooled.value_at_quantiles([QUANTILES[quantile]])[0])
+    return throughput, latency
+
+
+def results_dir(name: str) -> str:
+    return f"./runs/{name}/results"
+
+
+def _write(path: str, rows: list[dict]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def report(
+    name: str, probes: list[dict], searches: dict, knob: Knob
+) -> list[dict]:
+    """
+    Write every probe to results/capacity_probes.csv and the knee of every
+    experiment type to results/capacity.csv, printing them side by side.
+    """
+    knees = []
+    for exp_type, state in searches.items():
+        best = next(
+            (
+                probe
+                for probe in probes
+                if probe["experiment_type"] == str(exp_type)
+                and probe["level"] == state.passed
+                and probe["passed"]
+            ),
+            None,
+        )
+        if best is None:
+            print(f"⚠️ No probe of {exp_type} met the SLO")
+        knees.append(
+            {
+                "experiment_type": str(exp_type),
+                str(knob): best["level"] if best else None,
+                "throughput": best["throughput"] if best else None,
+                "latency": best["latency"] if best else None,
+                "probes": sum(
+                    p["experiment_type"] == str(exp_type) for p in probes
+                ),
+            }
+        )
+
+    output_dir = results_dir(name)
+    if probes:
+        _write(f"{output_dir}/capacity_probes.csv", probes)
+    _write(f"{output_dir}/capacity.csv", knees)
+
+    print(f"{'':<10}{str(knob):>14}{'ops/s':>12}{'latency':>10}")
+    for knee in knees:
+        values = [knee[str(knob)], knee["throughput"], knee["latency"]]
+        print(
+            f"{knee['experiment_type']:<10}"
+            + "".join(
+                f"{'-' if v is None else round(v, 1):>{w}}"
+                for v, w in zip(values, (14, 12, 10))
+            )
+        )
+
+    baseline, thesis = (knee["throughput"] for knee in knees)
+    if baseline and thesis:
+        change = (thesis - baseline) / baseline * 100
+        print(f"📏 Thesis capacity changes by {change:+.2f}%")
+    return knees
+
+
+def search(
+    config: ExperimentConfig,
+    slo: float,
+    knob: Knob = Knob.MAX_RATE,
+    start: int = 1000,
+    quantile: str = "p99",
+    max_probes: int = 12,
+    tolerance: float = 0.05,
+) -> list[dict]:
+    """
+    Find the highest `knob` level at which the latency at `quantile` stays
+    under `slo` ms, for baseline and thesis alike. Every probe is a short
+    run of the config, baseline and thesis probing in turn so that both see
+    the same conditions over time. A max-rate probe that falls short of the
+    offered rate fails as well, and so does one whose client failed, as an
+    overloaded workload may. The probes are written as they complete.
+    """
+    # The histograms need numpy, only import them once the search starts
+    from ..histograms import QUANTILES
+
+    if quantile not in QUANTILES:
+        raise ValueError(f"quantile must be one of {list(QUANTILES)}")
+    if knob in UNSUPPORTED.get(config.workload, ()):
+        raise ValueError(f"{config.workload} has no --{knob} to search")
+    if config.concurrent:
+        raise ValueError("Probes run one experiment type at a time")
+
+    runner = ExperimentRunner(config)
+    searches = {
+        exp_type: KneeSearch(start, tolerance=tolerance)
+        for exp_type in ExperimentType
+    }
+    probes = []
+
+    with runner.session():
+        for probe in range(1, max_probes + 1):
+            levels = {
+                exp_type: state.propose()
+                for exp_type, state in searches.items()
+            }
+            levels = {k: v for k, v in levels.items() if v is not None}
+            if not levels:
+                break
+
+            for exp_type, level in levels.items():
+                runner.config.run_args = f"--{knob}={level}"
+                try:
+                    output_dir = runner.run_one(exp_type, probe)
+                except (RuntimeError, TimeoutError) as e:
+                    print(f"❌ {exp_type} probe {probe}: {knob} {level}, {e}")
+                    throughput, latency, error = 0.0, math.inf, repr(e)
+                else:
+                    throughput, latency = measure(output_dir, quantile)
+                    error = None
+                passed = (
+                    error is None
+                    and latency <= slo
+                    and (
+                        knob != Knob.MAX_RATE
+                        or throughput >= SATURATION * level
+                    )
+                )
+                searches[exp_type].observe(level, passed)
+                probes.append(
+                    {
+                        "experiment_type": str(exp_type),
+                        "probe": probe,
+                        "level": level,
+                        "throughput": round(throughput, 3),
+                        "latency": round(latency, 3),
+                        "passed": passed,
+                        "error": error,
+                    }
+                )
+                # Keep what was measured should a later probe break off
+                _write(
+                    f"{results_dir(config.name)}/capacity_probes.csv", probes
+                )
+                if error is None:
+                    print(
+                        f"{'✅' if passed else '❌'} {exp_type} probe "
+                        f"{probe}: {knob} {level}, {throughput:.0f} ops/s, "
+                        f"{quantile} {latency:.1f}ms"
+                    )
+
+    return report(config.name, probes, searches, knob)
@@ -0,0 +1,69 @@
+from .models import WorkloadConfig
+from .readiness import READY_PATH, shell_http_ok, shell_wait
+from ..common import DASHBOARD_PORT, EXPERIMENT_DIR, SQL_PORT
+
+STORE_DIR = "/app/store"
+
+
+def server_command(join_str: str, advertise_host: str) -> list[str]:
+    """Command starting a cockroach node inside the experiment image."""
+    return [
+        "./cockroach",
+        "start",
+        "--insecure",
+        f"--join={join_str}",
+        f"--store={STORE_DIR}",
+        f"--log-dir={EXPERIMENT_DIR}",
+        f"--listen-addr=0.0.0.0:{SQL_PORT}",
+        f"--advertise-addr={advertise_host}:{SQL_PORT}",
+        f"--http-addr=0.0.0.0:{DASHBOARD_PORT}",
+    ]
+
+
+def client_command(
+    config: WorkloadConfig,
+    hosts: list[str],
+    seed: int,
+    initialize: bool = True,
+    run: bool = True,
+) -> str:
+    """
+    Shell command that initializes the cluster and the workload, then runs
+    the workload against the first of `hosts`, writing its output to
+    EXPERIMENT_DIR. Every phase starts as soon as the cluster is ready for
+    it. A cluster restored from a fixture skips the initialization, a
+    cluster prepared for a fixture skips the run.
+    """
+    host = hosts[0]
+    connection = f"postgresql://root@{host}:{SQL_PORT}?sslmode=disable"
+    steps = []
+    if initialize:
+        steps += [
+            # Wait for every node to be up
+            *(shell_wait(shell_http_ok(node)) for node in hosts),
+            # Init the cluster
+            f"./cockroach init --insecure --host={host}:{SQL_PORT}",
+        ]
+    # Wait for initialization, every node accepts SQL clients
+    steps += [shell_wait(shell_http_ok(node, READY_PATH)) for node in hosts]
+    if initialize:
+        # Init workload, it returns once the data is loaded
+        steps.append(
+            "./cockroach workload init "
+            f"{config.workload} {config.workload_args} {connection}"
+        )
+    if run:
+        # Run workload and pipe output
+        steps.append(
+            "./cockroach workload run "
+            f"{config.workload} {config.workload_args} "
+            f"--duration={config.duration} "
+            f"--ramp={config.ramp} "
+            f"--seed={seed} "
+            f"{config.run_args} "
+            f"--histograms={EXPERIMENT_DIR}/hdrhistograms.json "
+            "--display-format=incremental-json "
+            f"{connection} "
+            f"> {EXPERIMENT_DIR}/client.txt"
+        )
+    return " && ".join(steps)
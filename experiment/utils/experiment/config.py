@@ -7,7 +7,13 @@ PROJECT_ID = os.getenv("PROJECT_ID")
 USER = os.getenv("USER")
 NETWORK = "crdb-net"
 TF_DIR = "infra"
+ZONE = "us-central1-a"
+REGISTRY = f"us-central1-docker.pkg.dev/{PROJECT_ID}/docker-registry"
 
 
 def remote_dir(name: str):
     return f"/dev/disk/by-id/google-{name}-disk"
+
+
+def remote_image(experiment_type: str, tag: str = "latest") -> str:
+    return f"{REGISTRY}/crdb-experiment-{experiment_type}:{tag}"
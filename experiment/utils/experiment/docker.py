@@ -1,150 +1,89 @@
+import hashlib
 import subprocess
-from .models import WorkloadConfig
-from ..common import ExperimentType, EXPERIMENT_DIR, SQL_PORT, DASHBOARD_PORT
-from .config import PROJECT_ID, NETWORK
+from ..common import ExperimentType
+from .config import REGISTRY
+
+BUILD_CONTEXT = ".."
+DOCKERFILE = f"{BUILD_CONTEXT}/build/local/dockerfile"
+
+
+def _image_inputs(experiment_type: ExperimentType) -> list[str]:
+    """Every file that ends up in the image of an experiment type."""
+    return [
+        DOCKERFILE,
+        f"{BUILD_CONTEXT}/cockroach/cockroach-{experiment_type}",
+        f"{BUILD_CONTEXT}/cockroach/artifacts/libresolv_wrapper.so",
+    ]
+
+
+def content_tag(experiment_type: ExperimentType) -> str:
+    """Tag that only changes when the inputs of the image change."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"BIN_NAME=cockroach-{experiment_type}".encode())
+    for path in _image_inputs(experiment_type):
+        digest.update(path.encode())
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _image_exists(image: str) -> bool:
+    cmd = ["docker", "image", "inspect", "--format", "{{.Id}}", image]
+    return subprocess.run(cmd, capture_output=True).returncode == 0
+
+
+def _remote_image_exists(image: str) -> bool:
+    cmd = ["docker", "manifest", "inspect", image]
+    return subprocess.run(cmd, capture_output=True).returncode == 0
 
 
 class DockerManager:
     def __init__(self):
         self.image_tags = {}
-        self.running_containers = []
+        self.content_tags = {}
+        self.pushed = set()
 
     def build_image(self, experiment_type: ExperimentType) -> str:
-        image_tag = f"crdb-experiment-{str(experiment_type)}"
+        # Experiments sharing the manager build every image once
+        if experiment_type in self.image_tags:
+            return self.image_tags[experiment_type]
+
+        content = content_tag(experiment_type)
+        image_tag = f"crdb-experiment-{str(experiment_type)}:{content}"
+        self.content_tags[experiment_type] = content
+        self.image_tags[experiment_type] = image_tag
+
+        if _image_exists(image_tag):
+            print(f"⏭️ {image_tag} is up to date")
+            return image_tag
+
         cmd = [
             "docker",
             "build",
             "-f",
-            "./../build/local/dockerfile",
+            DOCKERFILE,
             "--build-arg",
             f"BIN_NAME=cockroach-{str(experiment_type)}",
             "-t",
             image_tag,
-            "..",
+            BUILD_CONTEXT,
         ]
 
         subprocess.run(cmd, check=True)
 
-        self.image_tags[experiment_type] = image_tag
+        return image_tag
 
     def push_image(self, experiment_type: ExperimentType):
         image_tag = self.image_tags[experiment_type]
-        remote_url = (
-            f"us-central1-docker.pkg.dev/{PROJECT_ID}/docker-registry"
-            f"/{image_tag}"
-        )
-        subprocess.run(
-            ["docker", "tag", image_tag, f"{remote_url}:latest"], check=True
-        )
-        subprocess.run(["docker", "push", remote_url], check=True)
-
-    def create_network(self):
-        subprocess.run(
-            ["docker", "network", "create", "-d", "bridge", NETWORK],
-            check=False,
-        )
-
-    def run_server(
-        self,
-        run: int,
-        server: int,
-        experiment_type: ExperimentType,
-        join_str: str,
-        local_output_dir: str,
-    ):
-        image_tag = self.image_tags[experiment_type]
-        server_name = f"server-{server}"
-        remote_store = "/app/store"
-        local_output_dir = f"{local_output_dir}/{server_name}"
-        subprocess.run(
-            [
-                "docker",
-                "run",
-                "-d",
-                "--name",
-                server_name,
-                "--network",
-                NETWORK,
-                "-p",
-                f"{SQL_PORT+server}:{SQL_PORT}",
-                "-p",
-                f"{DASHBOARD_PORT+server}:{DASHBOARD_PORT}",
-                "-v",
-                f"{local_output_dir}:{EXPERIMENT_DIR}",
-                image_tag,
-                "./cockroach",
-                "start",
-                "--insecure",
-                f"--join={join_str}",
-                f"--store={remote_store}",
-                f"--log-dir={EXPERIMENT_DIR}",
-                f"--listen-addr=0.0.0.0:{SQL_PORT}",
-                f"--advertise-addr=server-{server}:{SQL_PORT}",
-                f"--http-addr=0.0.0.0:{DASHBOARD_PORT}",
-            ],
-            check=True,
-        )
-        self.running_containers.append(server_name)
-
-    def run_client(
-        self,
-        config: WorkloadConfig,
-        local_output_dir: str,
-        experiment_type: ExperimentType,
-        seed: int,
-    ):
-        image_tag = self.image_tags[experiment_type]
-        client_name = "client"
-        remote_host = "server-1"
-        remote_connection = (
-            f"postgresql://root@{remote_host}:{SQL_PORT}?sslmode=disable"
-        )
-
-        full_cmd = (
-            # Init the cluster
-            f"./cockroach init --insecure --host={remote_host}:{SQL_PORT} "
-            # Wait for initialization
-            "&& sleep 5 && "
-            # Init workload
-            "./cockroach workload init "
-            f"{config.workload} {config.workload_args} {remote_connection} && "
-            # Wait for workload initialization
-            # f"mkdir -p {EXPERIMENT_DIR} && "
-            f"sleep 5 && "
-            # Run workload
-            "./cockroach workload run "
-            f"{config.workload} {config.workload_args} "
-            f"--duration={config.duration} "
-            f"--ramp={config.ramp} "
-            f"--seed={seed} "
-            f"--histograms={EXPERIMENT_DIR}/hdrhistograms.json "
-            f"--display-format=incremental-json "
-            f"{remote_connection} "
-            # Pipe output
-            f"> {EXPERIMENT_DIR}/client.txt"
-        )
-
-        subprocess.run(
-            [
-                "docker",
-                "run",
-                "--name",
-                client_name,
-                "--network",
-                NETWORK,
-                "-v",
-                f"{local_output_dir}:{EXPERIMENT_DIR}",
-                image_tag,
-                "bash",
-                "-ec",
-                full_cmd,
-            ],
-            check=True,
-        )
-
-        self.running_containers.append(client_name)
-
-    def stop_and_remove_running_containers(self):
-        for name in self.running_containers:
-            subprocess.run(["docker", "stop", name], check=False)
-            subprocess.run(["docker", "rm", name], check=False)
+        remote_url = f"{REGISTRY}/{image_tag}"
+        if remote_url in self.pushed:
+            return
+        if _remote_image_exists(remote_url):
+            print(f"⏭️ {remote_url} is already pushed")
+        else:
+            subprocess.run(
+                ["docker", "tag", image_tag, remote_url], check=True
+            )
+            subprocess.run(["docker", "push", remote_url], check=True)
+        self.pushed.add(remote_url)
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import urllib.parse
+from typing import AsyncIterator, Optional
+
+DOCKER_SOCKET = "/var/run/docker.sock"
+REQUEST_TIMEOUT = 60
+
+
+class DockerAPIError(RuntimeError):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+
+
+class DockerEngine:
+    """
+    Minimal asyncio client of the Docker Engine API on the local unix
+    socket, covering what a local run needs: containers, networks and the
+    event stream.
+
+    Every request opens its own connection, which costs a few microseconds
+    on a unix socket and lets any number of requests run concurrently.
+    """
+
+    def __init__(self, socket_path: str = DOCKER_SOCKET):
+        self.socket_path = socket_path
+
+    async def _open(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        body: Optional[dict] = None,
+    ) -> tuple[int, dict, asyncio.StreamReader, asyncio.StreamWriter]:
+        if params:
+            path += "?" + urllib.parse.urlencode(params)
+        payload = json.dumps(body).encode() if body is not None else b""
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\n"
+            "Host: docker\r\n"
+            "Connection: close\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "\r\n".encode() + payload
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode().partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return status, headers, reader, writer
+
+    @staticmethod
+    async def _chunks(
+        headers: dict, reader: asyncio.StreamReader
+    ) -> AsyncIterator[bytes]:
+        if headers.get("transfer-encoding") != "chunked":
+            if "content-length" in headers:
+                yield await reader.readexactly(int(headers["content-length"]))
+            else:
+                yield await reader.read()
+            return
+
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        body: Optional[dict] = None,
+        timeout: Optional[float] = REQUEST_TIMEOUT,
+    ):
+        """Send a request and return its decoded JSON body, if any."""
+
+        async def send():
+            status, headers, reader, writer = await self._open(
+                method, path, params, body
+            )
+            try:
+                data = b"".join(
+                    [chunk async for chunk in self._chunks(headers, reader)]
+                )
+            finally:
+                writer.close()
+
+            result = json.loads(data) if data.strip() else None
+            if status >= 400:
+                message = result.get("message") if result else data.decode()
+                raise DockerAPIError(status, message)
+            return result
+
+        return await asyncio.wait_for(send(), timeout)
+
+    async def events(
+        self, filters: Optional[dict] = None
+    ) -> AsyncIterator[dict]:
+        """Stream daemon events until the caller stops iterating."""
+        params = {"filters": json.dumps(filters)} if filters else None
+        status, headers, reader, writer = await self._open(
+            "GET", "/events", params
+        )
+        try:
+            if status >= 400:
+                raise DockerAPIError(status, (await reader.read()).decode())
+            buffer = b""
+            async for chunk in self._chunks(headers, reader):
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+        finally:
+            writer.close()
+
+    async def create_network(self, name: str):
+        try:
+            await self.request(
+                "POST",
+                "/networks/create",
+                body={"Name": name, "Driver": "bridge"},
+            )
+        except DockerAPIError as e:
+            # The network is kept across runs
+            if e.status != 409:
+                raise
+
+    async def create_volume(self, name: str, labels: Optional[dict] = None):
+        await self.request(
+            "POST",
+            "/volumes/create",
+            body={"Name": name, "Labels": labels or {}},
+        )
+
+    async def volumes(self, filters: Optional[dict] = None) -> list[dict]:
+        params = {"filters": json.dumps(filters)} if filters else None
+        result = await self.request("GET", "/volumes", params)
+        return result.get("Volumes") or []
+
+    async def volume_exists(self, name: str) -> bool:
+        try:
+            await self.request("GET", f"/volumes/{name}")
+        except DockerAPIError as e:
+            if e.status != 404:
+                raise
+            return False
+        return True
+
+    async def remove_volume(self, name: str):
+        try:
+            await self.request("DELETE", f"/volumes/{name}", {"force": "true"})
+        except DockerAPIError as e:
+            if e.status != 404:
+                raise
+
+    async def create_container(self, name: str, config: dict) -> str:
+        result = await self.request(
+            "POST", "/containers/create", {"name": name}, config
+        )
+        return result["Id"]
+
+    async def start(self, container: str):
+        await self.request("POST", f"/containers/{container}/start")
+
+    async def stop(self, container: str, timeout: int = 10):
+        try:
+            await self.request(
+                "POST",
+                f"/containers/{container}/stop",
+                {"t": timeout},
+                timeout=timeout + REQUEST_TIMEOUT,
+            )
+        except DockerAPIError as e:
+            # The container is already gone
+            if e.status != 404:
+                raise
+
+    async def restart(self, container: str, timeout: int = 10):
+        await self.request(
+            "POST",
+            f"/containers/{container}/restart",
+            {"t": timeout},
+            timeout=timeout + REQUEST_TIMEOUT,
+        )
+
+    async def remove(self, container: str):
+        try:
+            await self.request(
+                "DELETE", f"/containers/{container}", {"force": "true"}
+            )
+        except DockerAPIError as e:
+            if e.status != 404:
+                raise
+
+    async def wait(
+        self, container: str, timeout: Optional[float] = None
+    ) -> int:
+        """Block until the container exits and return its exit code."""
+        result = await self.request(
+            "POST", f"/containers/{container}/wait", timeout=timeout
+        )
+        return result["StatusCode"]
+
+    async def inspect(self, container: str) -> dict:
+        return await self.request("GET", f"/containers/{container}/json")
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+from .commands import STORE_DIR
+from .engine import DockerAPIError, DockerEngine
+from .models import WorkloadConfig
+
+FIXTURE_DIR = "/fixture"
+MANIFEST = ".manifest"
+COPY_TIMEOUT = 3600
+
+# Every file of a store with its size, in a stable order
+_LISTING = f"find . -type f ! -name {MANIFEST} -printf '%P %s\\n' | sort"
+
+
+class FixtureError(RuntimeError):
+    pass
+
+
+def fixture_key(
+    config: WorkloadConfig, cluster_size: int, content_tag: str
+) -> str:
+    """
+    Key of the initialized data of a workload. The content tag of the image
+    is part of it, a binary may change the on-disk format.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (
+        config.workload,
+        config.workload_args,
+        str(cluster_size),
+        content_tag,
+    ):
+        digest.update(part.encode() + b"\0")
+    return digest.hexdigest()
+
+
+def store_volume(server: str) -> str:
+    return f"crdb-store-{server}"
+
+
+def fixture_volume(key: str, server: str) -> str:
+    return f"crdb-fixture-{key}-{server}"
+
+
+async def prune_fixtures(engine: DockerEngine, images: set[str]):
+    """
+    Drop the fixtures of every image but `images`. Their keys embed the
+    content tag of a binary that is gone, so they would never be restored.
+    Fixtures still in use by a run elsewhere are left alone.
+    """
+    stale = {
+        volume["Name"]
+        for volume in await engine.volumes({"label": ["fixture"]})
+        if (volume.get("Labels") or {}).get("image") not in images
+    }
+
+    async def remove(volume: str) -> bool:
+        try:
+            await engine.remove_volume(volume)
+        except DockerAPIError as e:
+            if e.status != 409:
+                raise
+            return False
+        return True
+
+    removed = sum(await asyncio.gather(*(remove(v) for v in stale)))
+    if removed:
+        print(f"✅ Pruned {removed} fixture volumes of older images")
+
+
+class Fixtures:
+    """
+    Stores of an initialized cluster kept in docker volumes, one per server,
+    and copied into the store volumes of a run instead of initializing the
+    workload again.
+
+    A snapshot is taken while every server is stopped, so the stores are
+    consistent with each other. It carries a manifest of its files and
+    their sizes, which every restore is checked against. Clusters with a
+    name `prefix` share the fixtures, their stores are their own.
+    """
+
+    def __init__(
+        self,
+        engine: DockerEngine,
+        image: str,
+        cluster_size: int,
+        prefix: str = "",
+    ):
+        self.engine = engine
+        self.image = image
+        self.prefix = prefix
+        self.servers = [f"server-{i}" for i in range(1, cluster_size + 1)]
+
+    def _store(self, server: str) -> str:
+        return store_volume(f"{self.prefix}{server}")
+
+    async def _copy(self, name: str, script: str, binds: list[str]):
+        """Run `script` in a throwaway container of the experiment image."""
+        await self.engine.remove(name)
+        await self.engine.create_container(
+            name,
+            {
+                "Image": self.image,
+                "Cmd": ["sh", "-ec", script],
+                "HostConfig": {"Binds": binds, "NetworkMode": "none"},
+            },
+        )
+        try:
+            await self.engine.start(name)
+            status = await self.engine.wait(name, timeout=COPY_TIMEOUT)
+        finally:
+            await self.engine.remove(name)
+        if status != 0:
+            raise FixtureError(f"{name} exited with {status}")
+
+    async def exists(self, key: str) -> bool:
+        found = await asyncio.gather(
+            *(
+                self.engine.volume_exists(fixture_volume(key, server))
+                for server in self.servers
+            )
+        )
+        return all(found)
+
+    async def remove_stores(self):
+        await asyncio.gather(
+            *(
+                self.engine.remove_volume(self._store(server))
+                for server in self.servers
+            )
+        )
+
+    async def reset_stores(self):
+        """Give every server an empty store volume."""
+        await self.remove_stores()
+        await asyncio.gather(
+            *(
+                self.engine.create_volume(self._store(server))
+                for server in self.servers
+            )
+        )
+
+    async def _snapshot(self, key: str, server: str):
+        volume = fixture_volume(key, server)
+        await self.engine.create_volume(
+            volume, {"fixture": key, "image": self.image}
+        )
+        # The manifest is written last, a snapshot without one is incomplete
+        await self._copy(
+            f"{self.prefix}snapshot-{server}",
+            f"cp -a {STORE_DIR}/. {FIXTURE_DIR}/ && cd {FIXTURE_DIR} && "
+            f"{_LISTING} > {MANIFEST}.tmp && mv {MANIFEST}.tmp {MANIFEST}",
+            [
+                f"{self._store(server)}:{STORE_DIR}:ro",
+                f"{volume}:{FIXTURE_DIR}",
+            ],
+        )
+
+    async def snapshot(self, key: str):
+        """Copy the stores of the stopped servers into a new fixture."""
+        try:
+            await asyncio.gather(
+                *(self._snapshot(key, server) for server in self.servers)
+            )
+        except Exception:
+            await self.drop(key)
+            raise
+        print(f"✅ Saved fixture {key}")
+
+    async def _restore(self, key: str, server: str):
+        await self._copy(
+            f"{self.prefix}restore-{server}",
+            f"cp -a {FIXTURE_DIR}/. {STORE_DIR}/ && cd {STORE_DIR} && "
+            f"{_LISTING} | cmp -s - {MANIFEST} && rm {MANIFEST}",
+            [
+                f"{fixture_volume(key, server)}:{FIXTURE_DIR}:ro",
+                f"{self._store(server)}:{STORE_DIR}",
+            ],
+        )
+
+    async def restore(self, key: str) -> bool:
+        """
+        Fill fresh store volumes from the fixture. Returns False, leaving
+        the volumes empty, if there is no fixture or it failed verification,
+        in which case it is dropped.
+        """
+        await self.reset_stores()
+        if not await self.exists(key):
+            return False
+
+        try:
+            await asyncio.gather(
+                *(self._restore(key, server) for server in self.servers)
+            )
+        except FixtureError as e:
+            print(f"⚠️ Fixture {key} failed verification ({e}), dropping it")
+            await self.drop(key)
+            await self.reset_stores()
+            return False
+
+        print(f"✅ Restored fixture {key}")
+        return True
+
+    async def drop(self, key: str):
+        await asyncio.gather(
+            *(
+                self.engine.remove_volume(fixture_volume(key, server))
+                for server in self.servers
+            )
+        )
@@ -0,0 +1,195 @@
+import json
+import os
+import random
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Optional
+from .models import ExperimentConfig
+from ..common import ExperimentType, get_local_output_dir
+
+
+class Phase(str, Enum):
+    STARTED = "started"
+    MEASURED = "measured"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __str__(self):
+        return self.value
+
+
+class Status(str, Enum):
+    RUNNING = "running"
+    FAILED = "failed"
+    COMPLETED = "completed"
+
+    def __str__(self):
+        return self.value
+
+
+# Settings of how the runs are scheduled rather than what they measure, an
+# experiment may resume with other values
+SCHEDULING_FIELDS = ("concurrent", "pooled", "fixtures", "parallel")
+
+
+def journal_path(name: str) -> str:
+    return f"./runs/{name}/journal.json"
+
+
+def write_atomic(path: str, data: dict):
+    """Write JSON so that readers see either the old or the new file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class Journal:
+    """
+    Progress of an experiment in runs/<name>/journal.json: its config, the
+    seed of every run and the phase each experiment type of a run reached.
+
+    The file is replaced atomically on every change, so a crash at any
+    point leaves the last complete state behind for `--resume`.
+    """
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.data = data
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, name: str) -> Optional["Journal"]:
+        try:
+            with open(journal_path(name), "r") as f:
+                return cls(name, json.load(f))
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def open(cls, config: ExperimentConfig, resume: bool) -> "Journal":
+        """
+        The journal of a new experiment, or with `resume` the one left by an
+        earlier attempt, whose config has to match.
+        """
+        journal = cls.load(config.name) if resume else None
+        if journal is None:
+            if resume:
+                print(f"⚠️ No journal for {config.name}, starting over")
+            journal = cls(config.name, {"config": asdict(config), "runs": {}})
+        else:
+            recorded = journal.data["config"]
+            current = json.loads(json.dumps(asdict(config)))
+            changed = [
+                key
+                for key, value in current.items()
+                if key in recorded
+                and key not in SCHEDULING_FIELDS
+                and recorded[key] != value
+            ]
+            if changed:
+                raise ValueError(
+                    f"Cannot resume {config.name}, the config differs from "
+                    f"the journal in: {', '.join(changed)}"
+                )
+            done = sum(
+                str(entry.get("phase")) == Phase.DONE
+                for run in journal.data["runs"].values()
+                for entry in run.get("types", {}).values()
+            )
+            print(f"✅ Resuming {config.name} with {done} completed runs")
+
+        journal.data["status"] = str(Status.RUNNING)
+        journal.save()
+        return journal
+
+    def save(self):
+        write_atomic(journal_path(self.name), self.data)
+
+    def _run(self, run: int) -> dict:
+        return self.data["runs"].setdefault(str(run), {"types": {}})
+
+    def seed(self, run: int) -> int:
+        """The recorded seed of a run, drawn and recorded the first time."""
+        with self.lock:
+            entry = self._run(run)
+            if "seed" not in entry:
+                entry["seed"] = random.randint(1, 2**31 - 1)
+                self.save()
+            return entry["seed"]
+
+    def seeds(self) -> dict[int, int]:
+        return {
+            int(run): entry["seed"]
+            for run, entry in self.data["runs"].items()
+            if "seed" in entry
+        }
+
+    def phase(self, run: int, exp_type: ExperimentType) -> Optional[Phase]:
+        entry = self.data["runs"].get(str(run), {}).get("types", {})
+        phase = entry.get(str(exp_type), {}).get("phase")
+        return Phase(phase) if phase else None
+
+    def done(self, run: int, exp_type: ExperimentType) -> bool:
+        return self.phase(run, exp_type) == Phase.DONE
+
+    def record(
+        self,
+        run: int,
+        exp_type: ExperimentType,
+        phase: Phase,
+        error: Optional[str] = None,
+    ):
+        with self.lock:
+            entry = self._run(run)["types"].setdefault(str(exp_type), {})
+            entry["phase"] = str(phase)
+            entry["updated"] = _now()
+            if phase == Phase.STARTED:
+                entry["attempts"] = entry.get("attempts", 0) + 1
+            if error is not None:
+                entry["error"] = error
+            else:
+                entry.pop("error", None)
+            self.save()
+
+    def _set_aside(self, run: int, exp_type: ExperimentType):
+        """Keep the outputs of an incomplete attempt out of the way."""
+        output_dir = get_local_output_dir(self.name, run, exp_type)
+        if not os.path.exists(output_dir):
+            return
+        attempt = self._run(run)["types"][str(exp_type)].get("attempts", 0)
+        aside = f"{output_dir}.attempt-{attempt}"
+        os.replace(output_dir, aside)
+        print(f"⚠️ Moved the incomplete outputs of run {run} to {aside}")
+
+    @contextmanager
+    def track(self, run: int, exp_type: ExperimentType):
+        """Record a run of one experiment type from its start to its end."""
+        if self.phase(run, exp_type) is not None:
+            self._set_aside(run, exp_type)
+        self.record(run, exp_type, Phase.STARTED)
+        try:
+            yield
+        except BaseException as e:
+            self.record(run, exp_type, Phase.FAILED, repr(e))
+            raise
+        self.record(run, exp_type, Phase.DONE)
+
+    def finish(self, status: Status, error: Optional[str] = None):
+        with self.lock:
+            self.data["status"] = str(status)
+            if error is not None:
+                self.data["error"] = error
+            else:
+                self.data.pop("error", None)
+            self.save()
@@ -0,0 +1,377 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+from .commands import STORE_DIR, client_command, server_command
+from .config import NETWORK
+from .engine import DockerEngine
+from .fixtures import Fixtures, store_volume
+from .models import WorkloadConfig
+from .readiness import tcp_open, wait_until
+from ..common import DASHBOARD_PORT, EXPERIMENT_DIR, SQL_PORT
+
+CLIENT_CONTAINER = "client"
+SETUP_CONTAINER = "client-setup"
+FAULT_TIMEOUT = 120
+PORT_RELEASE_TIMEOUT = 60
+
+# Resources of a cluster running in a slot next to others: dedicated cores
+# per server and for the client, and a share of the host memory split
+# evenly between all containers
+CORES_PER_SERVER = 2
+CLIENT_CORES = 1
+MEMORY_SHARE = 0.8
+PORT_STRIDE = 100
+
+
+@dataclass(frozen=True)
+class Slot:
+    """
+    Share of the host a local cluster runs in. The default slot is the
+    whole host with the plain names, network and ports.
+    """
+
+    index: int = 0
+    prefix: str = ""
+    network: str = NETWORK
+    port_offset: int = 0
+    # Cores of every server, then of the client
+    cpusets: tuple[str, ...] = ()
+    # Bytes per container
+    memory: Optional[int] = None
+
+    def resources(self, container: int) -> dict:
+        """Limits of the `container`-th container, the client last."""
+        limits = {}
+        if self.cpusets:
+            limits["CpusetCpus"] = self.cpusets[container]
+        if self.memory:
+            limits["Memory"] = self.memory
+        return limits
+
+
+def _host_memory() -> int:
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def plan_slots(cluster_size: int, parallel: int = 1) -> list[Slot]:
+    """
+    Slots for `parallel` clusters, as many as the cores allow if 0. Every
+    slot gets its own network, names, ports, cores and memory, so that
+    clusters side by side do not compete with each other.
+    """
+    if parallel < 0:
+        raise ValueError(f"parallel must be 0 or more, not {parallel}")
+    if parallel == 1:
+        return [Slot()]
+
+    cores = sorted(os.sched_getaffinity(0))
+    per_cluster = cluster_size * CORES_PER_SERVER + CLIENT_CORES
+    fit = len(cores) // per_cluster
+    if fit == 0:
+        print(
+            f"⚠️ {len(cores)} cores do not fit a pinned cluster of "
+            f"{cluster_size}, running one cluster at a time"
+        )
+        return [Slot()]
+    if parallel > fit:
+        print(f"⚠️ Only {fit} clusters fit on {len(cores)} cores")
+    count = fit if parallel == 0 else min(parallel, fit)
+
+    containers = count * (cluster_size + 1)
+    memory = int(_host_memory() * MEMORY_SHARE / containers)
+    slots = []
+    for index in range(count):
+        own = cores[index * per_cluster : (index + 1) * per_cluster]
+        groups = [
+            own[i * CORES_PER_SERVER : (i + 1) * CORES_PER_SERVER]
+            for i in range(cluster_size)
+        ] + [own[cluster_size * CORES_PER_SERVER :]]
+        slots.append(
+            Slot(
+                index,
+                f"slot{index}-",
+                f"{NETWORK}-{index}",
+                index * PORT_STRIDE,
+                tuple(",".join(map(str, group)) for group in groups),
+                memory,
+            )
+        )
+    print(f"✅ Running {count} clusters side by side")
+    return slots
+
+
+class LocalCluster:
+    """
+    Server and client containers of one local run, driven concurrently over
+    the Docker Engine API.
+
+    Faults are scheduled as tasks next to the workload and the container
+    events are streamed to the console while the run lasts. `teardown`
+    cancels whatever is still pending and removes every container.
+
+    With a fixture key the stores live in docker volumes, restored from the
+    fixture or, the first time, initialized and saved to it. Clusters
+    sharing a `fixture_lock` prepare a missing fixture only once and
+    restore it one at a time.
+    """
+
+    def __init__(
+        self,
+        engine: DockerEngine,
+        image: str,
+        cluster_size: int,
+        output_dir: str,
+        slot: Slot = Slot(),
+        fixture_lock: Optional[asyncio.Lock] = None,
+    ):
+        self.engine = engine
+        self.image = image
+        self.cluster_size = cluster_size
+        self.output_dir = output_dir
+        self.slot = slot
+        self.containers: list[str] = []
+        self.tasks: list[asyncio.Task] = []
+        self.fixtures = Fixtures(engine, image, cluster_size, slot.prefix)
+        self.fixture_lock = fixture_lock or asyncio.Lock()
+        self.volumes = False
+
+    def name(self, container: str) -> str:
+        return f"{self.slot.prefix}{container}"
+
+    @property
+    def servers(self) -> list[str]:
+        return [
+            self.name(f"server-{i}") for i in range(1, self.cluster_size + 1)
+        ]
+
+    @property
+    def client(self) -> str:
+        return self.name(CLIENT_CONTAINER)
+
+    def _port(self, port: int, index: int) -> str:
+        return str(port + self.slot.port_offset + index)
+
+    def _bind(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        # The API, unlike the CLI, only takes absolute host paths
+        return f"{os.path.abspath(directory)}:{EXPERIMENT_DIR}"
+
+    async def _run(
+        self, name: str, cmd: list[str], host_config: dict, container: int
+    ):
+        self.containers.append(name)
+        await self.engine.create_container(
+            name,
+            {
+                "Image": self.image,
+                "Cmd": cmd,
+                "ExposedPorts": {
+                    f"{SQL_PORT}/tcp": {},
+                    f"{DASHBOARD_PORT}/tcp": {},
+                },
+                "HostConfig": {
+                    "NetworkMode": self.slot.network,
+                    **self.slot.resources(container),
+                    **host_config,
+                },
+            },
+        )
+        await self.engine.start(name)
+
+    async def _run_server(self, index: int, join_str: str):
+        name = self.name(f"server-{index}")
+        # The logs keep the plain name, the analysis looks for it
+        binds = [self._bind(f"{self.output_dir}/logs/server-{index}")]
+        if self.volumes:
+            binds.append(f"{store_volume(name)}:{STORE_DIR}")
+        await self._run(
+            name,
+            server_command(join_str, name),
+            {
+                "Binds": binds,
+                "PortBindings": {
+                    f"{SQL_PORT}/tcp": [
+                        {"HostPort": self._port(SQL_PORT, index)}
+                    ],
+                    f"{DASHBOARD_PORT}/tcp": [
+                        {"HostPort": self._port(DASHBOARD_PORT, index)}
+                    ],
+                },
+            },
+            index - 1,
+        )
+
+    async def start_servers(self, join_str: str):
+        """Create and start every server at once."""
+        await asyncio.gather(
+            *(
+                self._run_server(i, join_str)
+                for i in range(1, self.cluster_size + 1)
+            )
+        )
+
+    async def run_client(
+        self,
+        config: WorkloadConfig,
+        seed: int,
+        initialize: bool = True,
+        run: bool = True,
+        name: str = CLIENT_CONTAINER,
+    ):
+        """Run the client to completion, raising if it failed."""
+        name = self.name(name)
+        cmd = client_command(config, self.servers, seed, initialize, run)
+        await self._run(
+            name,
+            ["bash", "-ec", cmd],
+            {"Binds": [self._bind(f"{self.output_dir}/data")]},
+            self.cluster_size,
+        )
+        status = await self.engine.wait(name, timeout=None)
+        if status != 0:
+            raise RuntimeError(f"{name} exited with {status}")
+
+    async def prepare(self, key: str, config: WorkloadConfig, seed: int):
+        """
+        Initialize the cluster and the workload, then save the stores as the
+        fixture `key` and bring the servers back up on them.
+        """
+        await self.run_client(config, seed, run=False, name=SETUP_CONTAINER)
+        await asyncio.gather(
+            *(self.engine.stop(name, timeout=60) for name in self.servers)
+        )
+        await self.fixtures.snapshot(key)
+        await asyncio.gather(
+            *(self.engine.start(name) for name in self.servers)
+        )
+
+    def schedule(
+        self,
+        delay: float,
+        action: Callable[[], Awaitable],
+        what: str,
+        timeout: float = FAULT_TIMEOUT,
+    ) -> asyncio.Task:
+        """Run a fault `delay` seconds from now, bounded by `timeout`."""
+
+        async def fault():
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.wait_for(action(), timeout)
+            except Exception as e:
+                print(f"⚠️ [Fault] {what} failed: {e!r}")
+                return
+            print(f"[Fault] {what}")
+
+        task = asyncio.create_task(fault())
+        self.tasks.append(task)
+        return task
+
+    def restart_after(self, delay: float, name: str) -> asyncio.Task:
+        return self.schedule(
+            delay, lambda: self.engine.restart(name), f"Restarted {name}"
+        )
+
+    async def _watch(self):
+        filters = {
+            "type": ["container"],
+            "container": [
+                *self.servers,
+                self.client,
+                self.name(SETUP_CONTAINER),
+            ],
+            "event": ["start", "die", "health_status"],
+        }
+        async for event in self.engine.events(filters):
+            attributes = event.get("Actor", {}).get("Attributes", {})
+            status = event.get("status", event.get("Action", ""))
+            exit_code = attributes.get("exitCode")
+            suffix = f" (exit {exit_code})" if exit_code else ""
+            print(f"[Events] {attributes.get('name')}: {status}{suffix}")
+
+    def watch_events(self) -> asyncio.Task:
+        task = asyncio.create_task(self._watch())
+        self.tasks.append(task)
+        return task
+
+    async def teardown(self):
+        """
+        Cancel pending faults and remove every container at once, and the
+        store volumes if the run had them.
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        await asyncio.gather(
+            *(self.engine.remove(name) for name in self.containers)
+        )
+        self.containers = []
+        if self.volumes:
+            await self.fixtures.remove_stores()
+            self.volumes = False
+
+        # The next cluster of the slot publishes the same host ports
+        ports = [
+            int(self._port(SQL_PORT, i))
+            for i in range(1, self.cluster_size + 1)
+        ]
+        await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    wait_until,
+                    lambda port=port: not tcp_open("localhost", port),
+                    f"Release of port {port}",
+                    PORT_RELEASE_TIMEOUT,
+                )
+                for port in ports
+            )
+        )
+
+    async def _start(
+        self,
+        join_str: str,
+        config: WorkloadConfig,
+        seed: int,
+        fixture: Optional[str],
+    ):
+        """Start the servers on empty, restored or newly prepared stores."""
+        if not fixture:
+            await self.start_servers(join_str)
+            return
+
+        self.volumes = True
+        # The first cluster to miss the fixture prepares it, the others wait
+        # and restore it. Restores hold the lock too, so a fixture failing
+        # verification is never dropped while another cluster copies it.
+        async with self.fixture_lock:
+            if not await self.fixtures.restore(fixture):
+                await self.start_servers(join_str)
+                await self.prepare(fixture, config, seed)
+                return
+        await self.start_servers(join_str)
+
+    async def run(
+        self,
+        join_str: str,
+        config: WorkloadConfig,
+        seed: int,
+        restart: Optional[tuple[float, str]] = None,
+        fixture: Optional[str] = None,
+    ):
+        """
+        One run: start the servers, run the workload with the optional
+        `(delay, server)` restart next to it and clean up. With a `fixture`
+        key the initialized data is restored instead of loaded again.
+        """
+        self.watch_events()
+        try:
+            await self._start(join_str, config, seed, fixture)
+            if restart:
+                delay, server = restart
+                self.restart_after(delay, self.name(server))
+            await self.run_client(config, seed, initialize=not fixture)
+        finally:
+            await self.teardown()
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import json
+import os
+from dataclasses import asdict, dataclass, fields
 from ..common import DeploymentType
 
 
@@ -8,6 +10,8 @@ class WorkloadConfig:
     workload_args: str
     duration: int
     ramp: str
+    # Flags of `workload run` only, such as --max-rate
+    run_args: str = ""
 
 
 @dataclass
@@ -20,9 +24,47 @@ class ExperimentConfig:
     workload_args: str
     duration: int
     ramp: str
-    restart: bool
+    restart: bool = False
+    auto_ramp: bool = False
+    sequential: bool = False
+    concurrent: bool = False
+    pooled: bool = False
+    fixtures: bool = False
+    parallel: int = 1
+    run_args: str = ""
 
     def workload_config(self) -> WorkloadConfig:
         return WorkloadConfig(
-            self.workload, self.workload_args, self.duration, self.ramp
+            self.workload,
+            self.workload_args,
+            self.duration,
+            self.ramp,
+            self.run_args,
         )
+
+    def save(self):
+        """Record the config next to the runs of the experiment."""
+        path = config_path(self.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, name: str) -> "ExperimentConfig":
+        path = config_path(name)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            # Experiments run before configs were recorded have none
+            raise FileNotFoundError(
+                f"No recorded config for {name}, {path} is missing"
+            ) from None
+        known = {field.name for field in fields(cls)}
+        config = cls(**{k: v for k, v in data.items() if k in known})
+        config.deployment_type = DeploymentType(config.deployment_type)
+        return config
+
+
+def config_path(name: str) -> str:
+    return f"./runs/{name}/config.json"
@@ -0,0 +1,226 @@
+import shlex
+import subprocess
+import time
+from typing import Optional
+from .commands import client_command, server_command
+from .config import REGISTRY, ZONE, remote_dir
+from .models import WorkloadConfig
+from .readiness import wait_until
+from .terraform import (
+    END_TIMEOUT,
+    WAIT_RETRY,
+    WAIT_SLICE,
+    TerraformManager,
+    waited_exit_code,
+)
+from ..common import (
+    DeploymentType,
+    ExperimentType,
+    EXPERIMENT_DIR,
+    convert_duration,
+    create_join_str,
+    create_remote_host,
+)
+
+SERVER_CONTAINER = "crdb-server"
+CLIENT_CONTAINER = "crdb-client"
+SSH_TIMEOUT = 60
+
+
+class VMPool:
+    """
+    VMs provisioned once per experiment and reused by every run.
+
+    The VMs only idle, every run starts its own server and client
+    containers over ssh with the image of its experiment type. Between runs
+    the containers are removed, taking the store inside them along, and the
+    experiment directories are wiped.
+    """
+
+    def __init__(
+        self,
+        terraform: TerraformManager,
+        environment: ExperimentType,
+        cluster_size: int,
+    ):
+        # The environment only decides the workspace and the names of the
+        # VMs, runs of either experiment type can use them
+        self.terraform = terraform
+        self.environment = environment
+        self.cluster_size = cluster_size
+
+    def node(self, name: str) -> str:
+        return self.terraform.node_name(self.environment, name)
+
+    @property
+    def servers(self) -> list[str]:
+        return [
+            self.node(f"server-{i}") for i in range(1, self.cluster_size + 1)
+        ]
+
+    @property
+    def client(self) -> str:
+        return self.node("client")
+
+    @property
+    def nodes(self) -> list[str]:
+        return [*self.servers, self.client]
+
+    def _ssh(
+        self,
+        node: str,
+        cmd: str,
+        check: bool = True,
+        timeout: Optional[float] = None,
+    ) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [
+                "gcloud",
+                "compute",
+                "ssh",
+                node,
+                f"--zone={ZONE}",
+                "--command",
+                cmd,
+                "--quiet",
+            ],
+            capture_output=True,
+            text=True,
+            check=check,
+            timeout=timeout,
+        )
+
+    def _prepare(self, node: str):
+        # Pull from the artifact registry with the VM's service account
+        registry_host = REGISTRY.split("/")[0]
+        self._ssh(
+            node,
+            f"docker-credential-gcr configure-docker "
+            f"--registries={registry_host}",
+        )
+
+    def _address(self, node: str) -> str:
+        if node == self.client:
+            return "module.client.google_compute_instance.gce"
+        index = self.servers.index(node)
+        return f"module.servers[{index}].google_compute_instance.gce"
+
+    def provision(self):
+        self.terraform.provision(self.environment, self.cluster_size)
+        for node in self.nodes:
+            self._prepare(node)
+        print(f"✅ Provisioned a pool of {len(self.nodes)} VMs")
+
+    def teardown(self):
+        self.terraform.teardown(self.environment, self.cluster_size)
+
+    def _healthy(self, node: str) -> bool:
+        try:
+            result = self._ssh(
+                node, "docker info -f '{{.ServerVersion}}'", False, SSH_TIMEOUT
+            )
+        except subprocess.TimeoutExpired:
+            return False
+        return result.returncode == 0
+
+    def ensure_healthy(self):
+        """Replace every VM that cannot be reached or has no docker."""
+        unhealthy = [node for node in self.nodes if not self._healthy(node)]
+        if not unhealthy:
+            return
+
+        print(f"⚠️ Replacing unhealthy VMs: {', '.join(unhealthy)}")
+        self.terraform.provision(
+            self.environment,
+            self.cluster_size,
+            tuple(self._address(node) for node in unhealthy),
+        )
+        for node in unhealthy:
+            self._prepare(node)
+
+    def reset(self):
+        """Remove the containers of the last run and wipe its outputs."""
+        for node in self.nodes:
+            self._ssh(
+                node,
+                f"docker rm -f {SERVER_CONTAINER} {CLIENT_CONTAINER} "
+                f"> /dev/null 2>&1; sudo rm -rf {remote_dir(node)}/*",
+            )
+
+    def _docker_run(self, node: str, name: str, image: str, args: list[str]):
+        cmd = [
+            "docker",
+            "run",
+            "-d",
+            "--name",
+            name,
+            "--network",
+            "host",
+            "-v",
+            f"{remote_dir(node)}:{EXPERIMENT_DIR}",
+            image,
+            *args,
+        ]
+        self._ssh(node, shlex.join(cmd))
+
+    def start(
+        self,
+        experiment_type: ExperimentType,
+        config: WorkloadConfig,
+        seed: int,
+    ):
+        """Start the cluster and the workload with the type's image."""
+        image = self.terraform.image(experiment_type)
+        for node in self.nodes:
+            self._ssh(node, f"docker pull -q {image}")
+
+        prefix = self.terraform.prefix(self.environment)
+        join_str = create_join_str(
+            DeploymentType.REMOTE, self.cluster_size, prefix
+        )
+        for node in self.servers:
+            self._docker_run(
+                node,
+                SERVER_CONTAINER,
+                image,
+                server_command(join_str, create_remote_host(node)),
+            )
+
+        hosts = [create_remote_host(node) for node in self.servers]
+        self._docker_run(
+            self.client,
+            CLIENT_CONTAINER,
+            image,
+            ["sh", "-c", client_command(config, hosts, seed)],
+        )
+
+    def restart_server(self, node: str):
+        self._ssh(node, f"docker restart {SERVER_CONTAINER}")
+
+    def wait_for_client(self, config: WorkloadConfig):
+        """Wait until the workload has exited, raising if it failed."""
+        time.sleep(convert_duration(config.duration))
+
+        # `docker wait` returns the moment the workload exits and prints its
+        # exit code, bounded so that a dropped ssh session is retried
+        exit_codes = []
+
+        def exited() -> bool:
+            code = waited_exit_code(
+                self._ssh(
+                    self.client,
+                    f"timeout {WAIT_SLICE} docker wait {CLIENT_CONTAINER}",
+                    check=False,
+                )
+            )
+            if code is None:
+                return False
+            exit_codes.append(code)
+            return True
+
+        wait_until(exited, "Workload exit", END_TIMEOUT, WAIT_RETRY)
+        if exit_codes[-1] != 0:
+            raise RuntimeError(
+                f"Workload on {self.client} exited with {exit_codes[-1]}"
+            )
+        print("✅ Experiment reached state: end")
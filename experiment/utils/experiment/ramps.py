@@ -0,0 +1,56 @@
+import json
+import os
+from typing import Optional
+from ..common import DeploymentType
+
+# Ramps detected by `main.py detect-warmup`, used by `run --auto-ramp`
+RAMP_FILE = "./runs/warmup.json"
+# Ramps of the workloads when neither given nor detected
+DEFAULT_RAMPS = {"ycsb": "400s", "tpcc": "180s"}
+
+
+def _ramp_key(
+    deployment_type: DeploymentType,
+    workload: str,
+    workload_args: str,
+    cluster_size: int,
+) -> str:
+    return f"{deployment_type}/{workload} {workload_args}/n{cluster_size}"
+
+
+def _read_ramps() -> dict:
+    try:
+        with open(RAMP_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_ramp(
+    deployment_type: DeploymentType,
+    workload: str,
+    workload_args: str,
+    cluster_size: int,
+    ramp: int,
+    source: str,
+):
+    """Record the detected ramp in seconds of a workload and cluster."""
+    ramps = _read_ramps()
+    key = _ramp_key(deployment_type, workload, workload_args, cluster_size)
+    ramps[key] = {"ramp": ramp, "source": source}
+
+    os.makedirs(os.path.dirname(RAMP_FILE), exist_ok=True)
+    with open(RAMP_FILE, "w") as f:
+        json.dump(ramps, f, indent=2, sort_keys=True)
+
+
+def load_ramp(
+    deployment_type: DeploymentType,
+    workload: str,
+    workload_args: str,
+    cluster_size: int,
+) -> Optional[int]:
+    """The recorded ramp in seconds, None if it was never detected."""
+    key = _ramp_key(deployment_type, workload, workload_args, cluster_size)
+    entry = _read_ramps().get(key)
+    return entry["ramp"] if entry else None
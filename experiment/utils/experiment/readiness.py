@@ -0,0 +1,53 @@
+import shlex
+import socket
+import time
+from typing import Callable
+from ..common import DASHBOARD_PORT, SQL_PORT
+
+PROBE_INTERVAL = 0.5
+READY_TIMEOUT = 300
+
+# `/health` answers as soon as the process serves HTTP, `?ready=1` only once
+# the cluster is initialized and the node accepts SQL clients
+LIVE_PATH = "/health"
+READY_PATH = "/health?ready=1"
+
+
+def wait_until(
+    probe: Callable[[], bool],
+    what: str,
+    timeout: float = READY_TIMEOUT,
+    interval: float = PROBE_INTERVAL,
+):
+    """Poll `probe` until it holds, raising TimeoutError after `timeout`."""
+    deadline = time.monotonic() + timeout
+    while not probe():
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"{what} not reached after {timeout}s")
+        time.sleep(interval)
+
+
+def tcp_open(host: str, port: int = SQL_PORT) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=2):
+            return True
+    except OSError:
+        return False
+
+
+# Shell probes for commands that run next to the cluster, inside the
+# experiment image
+
+
+def shell_wait(
+    condition: str,
+    timeout: int = READY_TIMEOUT,
+    interval: float = PROBE_INTERVAL,
+) -> str:
+    """Shell command retrying `condition` until it succeeds or times out."""
+    script = f"until {condition}; do sleep {interval}; done"
+    return f"timeout {timeout} sh -c {shlex.quote(script)}"
+
+
+def shell_http_ok(host: str, path: str = LIVE_PATH) -> str:
+    return f"curl -sf -o /dev/null 'http://{host}:{DASHBOARD_PORT}{path}'"
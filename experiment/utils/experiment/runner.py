@@ -1,103 +1,380 @@
-import os
+import asyncio
 import subprocess
-import random
 import time
 import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
 from .models import ExperimentConfig
+from .config import NETWORK
 from .docker import DockerManager
+from .engine import DockerEngine
+from .fixtures import fixture_key, prune_fixtures
+from .journal import Journal, Phase, Status
+from .local import LocalCluster, Slot, plan_slots
 from .terraform import TerraformManager
-from ..analysis import run as run_analysis
+from .pool import VMPool
+from .ramps import load_ramp
 from ..common import (
     get_local_output_dir,
     create_join_str,
     convert_duration,
     DeploymentType,
     ExperimentType,
+    RESTARTED_NODE,
 )
 
+# NOTE: The analysis side needs pandas and scipy, import it only when a run
+# reaches it so that the CLI starts instantly
+if TYPE_CHECKING:
+    from ..sequential import SequentialDesign
+
+
+def run_analysis(name: str, sample_size: int):
+    from ..analysis import run
+
+    run(name, sample_size)
+
 
 class ExperimentRunner:
-    def __init__(self, config: ExperimentConfig):
+    def __init__(
+        self,
+        config: ExperimentConfig,
+        resume: bool = False,
+        docker: DockerManager | None = None,
+    ):
         self.config = config
-        self.docker = DockerManager()
-        self.terraform = TerraformManager()
+        self.resume = resume
+        self.journal: Journal | None = None
+        self.docker = docker or DockerManager()
+        self.engine = DockerEngine()
+        self.terraform = TerraformManager(
+            isolated=config.concurrent, image_tags=self.docker.content_tags
+        )
+        self.pools: dict[ExperimentType, VMPool] = {}
 
     def run(self):
-        match self.config.deployment_type:
-            case DeploymentType.LOCAL:
-                self._run_local()
-            case DeploymentType.REMOTE:
-                self._run_remote()
+        if self.config.auto_ramp:
+            self._use_detected_ramp()
+        self.journal = Journal.open(self.config, self.resume)
+        self.config.save()
+
+        try:
+            match self.config.deployment_type:
+                case DeploymentType.LOCAL:
+                    self._run_local()
+                case DeploymentType.REMOTE:
+                    self._run_remote()
+        except BaseException as e:
+            self.journal.finish(Status.FAILED, repr(e))
+            raise
+        self.journal.finish(Status.COMPLETED)
+
+    @contextmanager
+    def session(self):
+        """
+        What runs need when they are driven from outside of `run`, such as
+        the probes of a capacity search: the journal, the images and the
+        local network or pooled VMs, released at the end.
+        """
+        self.journal = Journal.open(self.config, self.resume)
+        self.config.save()
+        remote = self.config.deployment_type == DeploymentType.REMOTE
+        try:
+            for exp_type in ExperimentType:
+                self.docker.build_image(exp_type)
+                if remote:
+                    self.docker.push_image(exp_type)
+            if not remote:
+                asyncio.run(self.engine.create_network(NETWORK))
+                self._prune_fixtures()
+            if remote and self.config.concurrent:
+                self.terraform.create_workspaces()
+            if remote and self.config.pooled:
+                self._provision_pools()
+            yield self
+        except BaseException as e:
+            self.journal.finish(Status.FAILED, repr(e))
+            raise
+        else:
+            self.journal.finish(Status.COMPLETED)
+        finally:
+            for pool in set(self.pools.values()):
+                pool.teardown()
+
+    def run_one(self, exp_type: ExperimentType, run: int) -> str:
+        """
+        One run of an experiment type with the current config inside a
+        `session`. Returns the directory of its outputs.
+        """
+        seed = self.journal.seed(run)
+        with self.journal.track(run, exp_type):
+            match self.config.deployment_type:
+                case DeploymentType.LOCAL:
+                    asyncio.run(
+                        self._run_single_local(
+                            Slot(),
+                            run,
+                            exp_type,
+                            seed,
+                            defaultdict(asyncio.Lock),
+                        )
+                    )
+                case DeploymentType.REMOTE:
+                    self._run_single_remote(exp_type, run, seed)
+        return get_local_output_dir(self.config.name, run, exp_type)
+
+    def _pending(self, run: int) -> list[ExperimentType]:
+        """Experiment types of a run that did not complete yet."""
+        pending = []
+        for exp_type in ExperimentType:
+            if self.journal.done(run, exp_type):
+                print(f"⏭️ Run {run} of {exp_type} is already complete")
+            else:
+                pending.append(exp_type)
+        return pending
+
+    def _use_detected_ramp(self):
+        # A resumed experiment keeps the ramp its first runs were taken with
+        recorded = Journal.load(self.config.name) if self.resume else None
+        if recorded is not None:
+            self.config.ramp = recorded.data["config"]["ramp"]
+            print(f"✅ Using the journal's ramp of {self.config.ramp}")
+            return
+
+        ramp = load_ramp(
+            self.config.deployment_type,
+            self.config.workload,
+            self.config.workload_args,
+            self.config.cluster_size,
+        )
+        if ramp is None:
+            print(
+                "⚠️ No detected ramp for this workload and cluster size, "
+                f"keeping {self.config.ramp}"
+            )
+            return
+
+        print(f"✅ Using detected ramp of {ramp}s")
+        self.config.ramp = f"{ramp}s"
+
+    def _prune_fixtures(self):
+        if self.config.fixtures:
+            images = set(self.docker.image_tags.values())
+            asyncio.run(prune_fixtures(self.engine, images))
 
     def _run_local(self):
         for exp_type in ExperimentType:
             self.docker.build_image(exp_type)
+        self._prune_fixtures()
 
-        self.docker.create_network()
+        slots = plan_slots(self.config.cluster_size, self.config.parallel)
+        last = asyncio.run(self._schedule_local(slots))
+        run_analysis(self.config.name, last)
+
+    async def _schedule_local(self, slots: list[Slot]) -> int:
+        """
+        Run the pending runs on the slots, every slot taking the next run in
+        order as soon as it is free. Returns the number of pairs that were
+        looked at, all of them unless sampling sequentially stopped early.
+        """
+        await asyncio.gather(
+            *(self.engine.create_network(slot.network) for slot in slots)
+        )
 
+        queue = asyncio.Queue()
+        remaining = {}
         for i in range(1, self.config.sample_size + 1):
-            seed = random.randint(1, 2**31 - 1)
-            for exp_type in ExperimentType:
-                self._run_single_local(i, exp_type, seed)
-                time.sleep(15)
+            seed = self.journal.seed(i)
+            pending = self._pending(i)
+            remaining[i] = len(pending)
+            for exp_type in pending:
+                queue.put_nowait((i, exp_type, seed))
 
-        run_analysis(self.config.name, self.config.sample_size)
+        design = self._sequential_design()
+        looked = 0
+        stopped = False
+        look_lock = asyncio.Lock()
+        fixture_locks = defaultdict(asyncio.Lock)
 
-    def _run_single_local(self, run: int, exp_type: ExperimentType, seed: int):
-        # Preparation
+        async def look():
+            """Look at every pair that completed, in order."""
+            nonlocal looked, stopped
+            async with look_lock:
+                while (
+                    not stopped
+                    and looked < self.config.sample_size
+                    and remaining[looked + 1] == 0
+                ):
+                    looked += 1
+                    stopped = await asyncio.to_thread(
+                        self._stop_early, design, looked
+                    )
+
+        async def work(slot: Slot):
+            while not stopped and not queue.empty():
+                run, exp_type, seed = queue.get_nowait()
+                with self.journal.track(run, exp_type):
+                    await self._run_single_local(
+                        slot, run, exp_type, seed, fixture_locks
+                    )
+                remaining[run] -= 1
+                await look()
+
+        await look()
+        await asyncio.gather(*(work(slot) for slot in slots))
+        return looked
+
+    def _sequential_design(self) -> "SequentialDesign | None":
+        if not self.config.sequential:
+            return None
+
+        from ..sequential import SequentialDesign
+
+        return SequentialDesign(self.config.sample_size)
+
+    def _stop_early(self, design: "SequentialDesign | None", run: int) -> bool:
+        """Look at the first `run` pairs if sampling sequentially."""
+        if design is None:
+            return False
+
+        from ..sequential import Decision
+
+        decision = design.look_at_runs(self.config.name, run)
+        design.save(self.config.name)
+        if decision == Decision.CONTINUE:
+            return False
+
+        print(f"🛑 Stopping after {run} pairs: {decision}")
+        return True
+
+    async def _run_single_local(
+        self,
+        slot: Slot,
+        run: int,
+        exp_type: ExperimentType,
+        seed: int,
+        fixture_locks: dict[str, asyncio.Lock],
+    ):
         join_str = create_join_str(
-            DeploymentType.LOCAL, self.config.cluster_size
+            DeploymentType.LOCAL, self.config.cluster_size, slot.prefix
         )
-
-        # Cluster
-        local_output_dir = get_local_output_dir(
-            self.config.name, run, exp_type
+        cluster = LocalCluster(
+            self.engine,
+            self.docker.image_tags[exp_type],
+            self.config.cluster_size,
+            get_local_output_dir(self.config.name, run, exp_type),
+            slot,
         )
-        for server in range(1, self.config.cluster_size + 1):
-            output_dir = f"{local_output_dir}/logs"
-            os.makedirs(output_dir, exist_ok=True)
-            self.docker.run_server(run, server, exp_type, join_str, output_dir)
 
-        # 🔁 Optional Restart Thread
+        restart = None
         if self.config.restart:
+            delay = (convert_duration(self.config.duration) / 3) * 4
+            restart = (delay, RESTARTED_NODE[DeploymentType.LOCAL])
 
-            def restart_container():
-                delay = (convert_duration(self.config.duration) / 3) * 4
-                time.sleep(delay)
-                container_name = "server-2"
-                subprocess.run(
-                    ["docker", "restart", container_name], check=True
-                )
-                print(
-                    f"[Restart Thread] Restarted container: {container_name}"
-                )
-
-            threading.Thread(target=restart_container, daemon=True).start()
+        fixture = None
+        if self.config.fixtures:
+            fixture = fixture_key(
+                self.config.workload_config(),
+                self.config.cluster_size,
+                self.docker.content_tags[exp_type],
+            )
+            cluster.fixture_lock = fixture_locks[fixture]
 
-        # Client
-        output_dir = f"{local_output_dir}/data"
-        os.makedirs(output_dir, exist_ok=True)
-        self.docker.run_client(
-            self.config.workload_config(), output_dir, exp_type, seed
+        await cluster.run(
+            join_str, self.config.workload_config(), seed, restart, fixture
         )
 
-        # Clean up
-        self.docker.stop_and_remove_running_containers()
-
     def _run_remote(self):
+        if self.config.fixtures:
+            print("⚠️ Fixtures are only supported locally, ignoring them")
+        if self.config.parallel != 1:
+            print("⚠️ --parallel is only supported locally, ignoring it")
+
         for exp_type in ExperimentType:
             self.docker.build_image(exp_type)
             self.docker.push_image(exp_type)
 
-        for i in range(1, self.config.sample_size + 1):
-            for exp_type in ExperimentType:
-                self._run_single_remote(exp_type, i)
+        if self.config.concurrent:
+            self.terraform.create_workspaces()
+
+        design = self._sequential_design()
+        looked = 0
+        try:
+            if self.config.pooled:
+                self._provision_pools()
+
+            for i in range(1, self.config.sample_size + 1):
+                seed = self.journal.seed(i)
+                if self.config.concurrent:
+                    self._run_pair_remote(i, seed)
+                else:
+                    for exp_type in self._pending(i):
+                        with self.journal.track(i, exp_type):
+                            self._run_single_remote(exp_type, i, seed)
+
+                looked = i
+                if self._stop_early(design, i):
+                    break
+        finally:
+            for pool in set(self.pools.values()):
+                pool.teardown()
+
+        run_analysis(self.config.name, looked)
+
+    def _provision_pools(self):
+        """
+        Provision the VMs once for the whole experiment: one pool per
+        experiment type when running concurrently, else a shared one.
+        """
+        if self.config.concurrent:
+            environments = list(ExperimentType)
+        else:
+            environments = [ExperimentType.BASELINE]
+
+        pools = {
+            environment: VMPool(
+                self.terraform, environment, self.config.cluster_size
+            )
+            for environment in environments
+        }
+        # Registered before provisioning, so that the teardown also covers
+        # the VMs of a provisioning that failed partway
+        for exp_type in ExperimentType:
+            self.pools[exp_type] = pools.get(
+                exp_type, pools[ExperimentType.BASELINE]
+            )
+        with ThreadPoolExecutor(max_workers=len(pools)) as executor:
+            list(executor.map(VMPool.provision, pools.values()))
+
+    def _run_pair_remote(self, run: int, seed: int):
+        """
+        Run baseline and thesis at the same time in their own environments,
+        so that both see the same cloud conditions.
+        """
+
+        def run_tracked(exp_type: ExperimentType):
+            with self.journal.track(run, exp_type):
+                self._run_single_remote(exp_type, run, seed)
 
-        run_analysis(self.config.name, self.config.sample_size)
+        with ThreadPoolExecutor(max_workers=len(ExperimentType)) as pool:
+            futures = [
+                pool.submit(run_tracked, exp_type)
+                for exp_type in self._pending(run)
+            ]
+            # Surface the first failure once both are done
+            for future in futures:
+                future.result()
+
+    def _run_single_remote(
+        self, experiment_type: ExperimentType, run: int, seed: int
+    ):
+        if experiment_type in self.pools:
+            self._run_single_pooled(experiment_type, run, seed)
+            return
 
-    def _run_single_remote(self, experiment_type: ExperimentType, run: int):
         # Preparation
-        seed = random.randint(1, 2**31 - 1)
         workload_config = self.config.workload_config()
 
         # Start experiment
@@ -119,7 +396,9 @@ class ExperimentRunner:
             def restart_container():
                 delay = (convert_duration(self.config.duration) / 3) * 4
                 time.sleep(delay)
-                container_name = "server-3"
+                container_name = self.terraform.node_name(
+                    experiment_type, RESTARTED_NODE[DeploymentType.REMOTE]
+                )
 
                 cmd = "docker restart $(docker ps -q)"
 
@@ -144,9 +423,12 @@ class ExperimentRunner:
         self.terraform.wait_for_experiment_state(
             experiment_type, workload_config, "end"
         )
+        self.journal.record(run, experiment_type, Phase.MEASURED)
 
         # Download results
-        self.terraform.download(self.config.name, experiment_type, run)
+        self.terraform.download(
+            self.config.name, experiment_type, run, self.config.cluster_size
+        )
 
         # Clean up
         self.terraform.destroy(
@@ -155,3 +437,34 @@ class ExperimentRunner:
             seed,
             workload_config,
         )
+
+    def _run_single_pooled(
+        self, experiment_type: ExperimentType, run: int, seed: int
+    ):
+        pool = self.pools[experiment_type]
+        workload_config = self.config.workload_config()
+
+        # Reuse the VMs of the last run
+        pool.ensure_healthy()
+        pool.reset()
+        pool.start(experiment_type, workload_config, seed)
+
+        # 🔁 Optional Restart Thread
+        if self.config.restart:
+
+            def restart_container():
+                delay = (convert_duration(self.config.duration) / 3) * 4
+                time.sleep(delay)
+                node = pool.node(RESTARTED_NODE[DeploymentType.REMOTE])
+                pool.restart_server(node)
+                print(f"[Restart Thread] Restarted container on: {node}")
+
+            threading.Thread(target=restart_container, daemon=True).start()
+
+        pool.wait_for_client(workload_config)
+        self.journal.record(run, experiment_type, Phase.MEASURED)
+
+        # Download results, the VMs stay up for the next run
+        self.terraform.download(
+            self.config.name, experiment_type, run, self.config.cluster_size
+        )
@@ -0,0 +1,252 @@
+import hashlib
+import itertools
+import json
+import tomllib
+from dataclasses import asdict, fields
+from typing import Optional
+from .docker import DockerManager
+from .journal import Status, write_atomic
+from .models import ExperimentConfig
+from .ramps import DEFAULT_RAMPS
+from .runner import ExperimentRunner
+from ..common import DeploymentType, convert_duration
+
+REQUIRED = ("deployment_type", "sample_size", "cluster_size", "duration")
+
+_CONFIG_FIELDS = {
+    field.name
+    for field in fields(ExperimentConfig)
+    if field.name not in ("name", "workload", "workload_args")
+}
+
+
+def campaign_path(campaign: str) -> str:
+    return f"./runs/{campaign}/campaign.json"
+
+
+def _axes(values: dict) -> list[tuple[str, list]]:
+    """Every key of a table with its values, a scalar being a single one."""
+    return [
+        (key, value if isinstance(value, list) else [value])
+        for key, value in values.items()
+    ]
+
+
+def _slug(workload: str, point: dict, varying: set[str]) -> str:
+    parts = [workload]
+    for key, value in point.items():
+        if key in varying:
+            parts += [key, str(value)]
+    return "-".join(parts)
+
+
+def expand(plan: dict) -> list[ExperimentConfig]:
+    """
+    The experiments of a plan: every workload of the plan crossed with every
+    value of every list, in the workload's own table or at the top level.
+
+        name = "campaign"
+        deployment_type = "local"
+        sample_size = 10
+        duration = "5m"
+        cluster_size = [3, 5]
+
+        [[workloads]]
+        workload = "ycsb"
+        args = { workload = ["A", "B"] }
+
+        [[workloads]]
+        workload = "tpcc"
+        args = { warehouses = [10, 100] }
+        ramp = "240s"
+
+    Each becomes `<campaign>/<workload>-<args>-<varying settings>`, e.g.
+    `campaign/ycsb-workload-A-cluster_size-3`, with the args passed to
+    `cockroach workload` as `--<key>=<value>`.
+    """
+    campaign = plan["name"]
+    defaults = {
+        k: v for k, v in plan.items() if k not in ("name", "workloads")
+    }
+    configs = []
+    for entry in plan.get("workloads", []):
+        workload = entry["workload"]
+        settings = {
+            **defaults,
+            **{
+                k: v for k, v in entry.items() if k not in ("workload", "args")
+            },
+        }
+        unknown = set(settings) - _CONFIG_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        missing = [key for key in REQUIRED if key not in settings]
+        if missing:
+            raise ValueError(f"Missing settings: {', '.join(missing)}")
+        settings.setdefault("ramp", DEFAULT_RAMPS.get(workload))
+        if settings["ramp"] is None:
+            raise ValueError(f"No default ramp for {workload}, set one")
+
+        config_axes = _axes(settings)
+        arg_axes = _axes(entry.get("args", {}))
+        axes = arg_axes + config_axes
+        # The args always name the experiment, the settings when they vary
+        varying = {key for key, _ in arg_axes} | {
+            key for key, values in config_axes if len(values) > 1
+        }
+        for values in itertools.product(*(values for _, values in axes)):
+            point = dict(zip((key for key, _ in axes), values))
+            args = {key: point[key] for key, _ in arg_axes}
+            config = ExperimentConfig(
+                name=f"{campaign}/{_slug(workload, point, varying)}",
+                workload=workload,
+                workload_args=" ".join(
+                    f"--{key}={value}" for key, value in args.items()
+                ),
+                **{key: point[key] for key, _ in config_axes},
+            )
+            config.deployment_type = DeploymentType(config.deployment_type)
+            configs.append(config)
+
+    names = [config.name for config in configs]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Experiments expand twice: {sorted(duplicates)}")
+    return configs
+
+
+def load_plan(path: str) -> dict:
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+class Campaign:
+    """
+    Status of every experiment of a sweep in runs/<campaign>/campaign.json,
+    the experiments themselves are recorded below it.
+    """
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.data = data
+
+    @classmethod
+    def open(
+        cls, plan: dict, configs: list[ExperimentConfig], resume: bool
+    ) -> "Campaign":
+        name = plan["name"]
+        digest = hashlib.blake2b(repr(plan).encode(), digest_size=8)
+        data = None
+        if resume:
+            try:
+                with open(campaign_path(name), "r") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                print(f"⚠️ No campaign {name} to resume, starting over")
+        if data and data["plan_digest"] != digest.hexdigest():
+            raise ValueError(f"Cannot resume {name}, the plan changed")
+
+        data = data or {
+            "plan": plan,
+            "plan_digest": digest.hexdigest(),
+            "experiments": {},
+        }
+        for config in configs:
+            data["experiments"].setdefault(
+                config.name, {"status": None, "config": asdict(config)}
+            )
+        data["status"] = str(Status.RUNNING)
+        campaign = cls(name, data)
+        campaign.save()
+        return campaign
+
+    def save(self):
+        write_atomic(campaign_path(self.name), self.data)
+
+    def status(self, experiment: str) -> Optional[str]:
+        return self.data["experiments"][experiment]["status"]
+
+    def record(
+        self, experiment: str, status: Status, error: Optional[str] = None
+    ):
+        entry = self.data["experiments"][experiment]
+        entry["status"] = str(status)
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry.pop("error", None)
+        self.save()
+
+    def failed(self) -> list[str]:
+        return [
+            name
+            for name, entry in self.data["experiments"].items()
+            if entry["status"] == Status.FAILED
+        ]
+
+
+def _ingest(name: str):
+    # The store needs pandas, only import it once there are results
+    from ..store import ingest
+
+    ingest(name)
+
+
+def run(plan_path: str, resume: bool = False, dry_run: bool = False) -> list:
+    """
+    Run every experiment of a plan one after the other, each on all of the
+    capacity its options ask for, and ingest its results into the store.
+
+    Images are built and pushed once for the whole campaign, fixtures are
+    shared by every experiment with the same workload and cluster size. A
+    failed experiment is recorded and the sweep moves on, `resume` redoes
+    only what did not complete. Returns the names of the failed experiments.
+    """
+    plan = load_plan(plan_path)
+    configs = expand(plan)
+    hours = (
+        sum(
+            2 * config.sample_size * convert_duration(config.duration)
+            for config in configs
+        )
+        / 3600
+    )
+    print(
+        f"📏 {len(configs)} experiments, at least {hours:.1f}h of workload "
+        "if run one pair at a time"
+    )
+    if dry_run:
+        for config in configs:
+            print(f"  {config.name}: {config.workload} {config.workload_args}")
+        return []
+
+    campaign = Campaign.open(plan, configs, resume)
+    docker = DockerManager()
+    for config in configs:
+        status = campaign.status(config.name)
+        if status == Status.COMPLETED:
+            print(f"⏭️ {config.name} is already complete")
+            continue
+
+        print(f"▶️ {config.name}")
+        campaign.record(config.name, Status.RUNNING)
+        try:
+            # An experiment that started before continues from its journal
+            ExperimentRunner(config, status is not None, docker).run()
+            _ingest(config.name)
+        except Exception as e:
+            print(f"❌ {config.name} failed: {e!r}")
+            campaign.record(config.name, Status.FAILED, repr(e))
+            continue
+        campaign.record(config.name, Status.COMPLETED)
+
+    failed = campaign.failed()
+    campaign.data["status"] = str(
+        Status.FAILED if failed else Status.COMPLETED
+    )
+    campaign.save()
+    print(
+        f"✅ Campaign {campaign.name}: {len(configs) - len(failed)} of "
+        f"{len(configs)} experiments completed"
+    )
+    return failed
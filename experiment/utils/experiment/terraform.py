@@ -2,21 +2,102 @@ import subprocess
 import os
 import time
 import json
-from .config import TF_DIR, PROJECT_ID, USER, remote_dir
+from typing import Optional
+from .config import TF_DIR, PROJECT_ID, USER, ZONE, remote_dir, remote_image
 from ..common import (
     DeploymentType,
     ExperimentType,
-    SQL_PORT,
-    DASHBOARD_PORT,
     EXPERIMENT_DIR,
     create_join_str,
     create_remote_host,
     convert_duration,
 )
+from .commands import client_command, server_command
 from .models import WorkloadConfig
+from .readiness import wait_until
+
+# Bounds of the waits for the workload container on the client VM, in
+# seconds. The end is awaited in slices of WAIT_SLICE.
+START_TIMEOUT = 600
+END_TIMEOUT = 600
+WAIT_SLICE = 60
+# Pause before the next slice when ssh or `docker wait` itself failed
+WAIT_RETRY = 5
+
+
+def waited_exit_code(
+    result: subprocess.CompletedProcess,
+) -> Optional[int]:
+    """
+    Exit code of the containers a `docker wait` over ssh waited for, None
+    if it did not complete: the slice timed out, ssh dropped or there was
+    no container to wait for.
+    """
+    codes = result.stdout.split()
+    if result.returncode != 0 or not codes:
+        return None
+    if not all(code.isdigit() for code in codes):
+        return None
+    return max(int(code) for code in codes)
 
 
 class TerraformManager:
+    def __init__(
+        self, isolated: bool = False, image_tags: Optional[dict] = None
+    ):
+        # Isolated environments keep their state in a terraform workspace
+        # per experiment type and prefix every resource name with it, so
+        # that baseline and thesis can run side by side
+        self.isolated = isolated
+        # Content tags of the pushed images by experiment type, filled in
+        # once they are built
+        self.image_tags = {} if image_tags is None else image_tags
+
+    def image_tag(self, experiment_type: ExperimentType) -> str:
+        return self.image_tags.get(experiment_type, "latest")
+
+    def image(self, experiment_type: ExperimentType) -> str:
+        return remote_image(experiment_type, self.image_tag(experiment_type))
+
+    def prefix(self, experiment_type: ExperimentType) -> str:
+        return f"{experiment_type}-" if self.isolated else ""
+
+    def node_name(self, experiment_type: ExperimentType, node: str) -> str:
+        return f"{self.prefix(experiment_type)}{node}"
+
+    def _env(self, experiment_type: ExperimentType) -> dict:
+        env = os.environ.copy()
+        if self.isolated:
+            env["TF_WORKSPACE"] = str(experiment_type)
+        return env
+
+    def create_workspaces(self):
+        """Create the workspace of every experiment type if missing."""
+        result = subprocess.run(
+            ["terraform", "workspace", "list"],
+            cwd=TF_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        existing = {line.strip("* ") for line in result.stdout.splitlines()}
+        for experiment_type in ExperimentType:
+            if str(experiment_type) in existing:
+                continue
+            subprocess.run(
+                ["terraform", "workspace", "new", str(experiment_type)],
+                cwd=TF_DIR,
+                check=True,
+            )
+
+        # `workspace new` also selects it, runs that are not isolated have
+        # to keep using the default one
+        subprocess.run(
+            ["terraform", "workspace", "select", "default"],
+            cwd=TF_DIR,
+            check=True,
+        )
+
     def _build_vars(
         self,
         experiment_type: ExperimentType,
@@ -24,54 +105,21 @@ class TerraformManager:
         seed: int,
         config: WorkloadConfig,
     ) -> dict:
-        remote_host = create_remote_host("server-1")
-        remote_connection = (
-            f"postgresql://root@{remote_host}:{SQL_PORT}?sslmode=disable"
-        )
-
-        client_cmd = (
-            # Init the cluster
-            f"./cockroach init --insecure --host={remote_host}:{SQL_PORT} "
-            # Wait for initialization
-            "&& sleep 5 && "
-            # Init workload
-            "./cockroach workload init "
-            f"{config.workload} {config.workload_args} {remote_connection} && "
-            # Wait for workload initialization
-            # f"mkdir -p {EXPERIMENT_DIR} && "
-            f"sleep 5 && "
-            # Run workload
-            f"./cockroach workload run "
-            f"{config.workload} {config.workload_args} "
-            f"--duration={config.duration} "
-            f"--ramp={config.ramp} "
-            f"--seed={seed} "
-            f"--histograms={EXPERIMENT_DIR}/hdrhistograms.json "
-            f"--display-format=incremental-json "
-            f"{remote_connection} "
-            # Pipe output
-            f"> {EXPERIMENT_DIR}/client.txt"
-        )
-
+        prefix = self.prefix(experiment_type)
+        hosts = [
+            create_remote_host(f"{prefix}server-{i}")
+            for i in range(1, cluster_size + 1)
+        ]
+        client_cmd = client_command(config, hosts, seed)
         client_cmd = json.dumps(["sh", "-c", client_cmd])
 
         server_cmds = []
-        join_str = create_join_str(DeploymentType.REMOTE, cluster_size)
+        join_str = create_join_str(DeploymentType.REMOTE, cluster_size, prefix)
         print(join_str)
 
         for i in range(1, cluster_size + 1):
-            remote_host = create_remote_host(f"server-{i}")
-            server_cmd = [
-                "./cockroach",
-                "start",
-                "--insecure",
-                f"--join={join_str}",
-                "--store=/app/store",
-                f"--log-dir={EXPERIMENT_DIR}",
-                f"--listen-addr=0.0.0.0:{SQL_PORT}",
-                f"--advertise-addr={remote_host}:{SQL_PORT}",
-                f"--http-addr=0.0.0.0:{DASHBOARD_PORT}",
-            ]
+            remote_host = create_remote_host(f"{prefix}server-{i}")
+            server_cmd = server_command(join_str, remote_host)
             server_cmds.append(server_cmd)
 
         server_cmds = json.dumps(server_cmds)
@@ -83,8 +131,43 @@ class TerraformManager:
             "cluster_size": cluster_size,
             "experiment_dir": EXPERIMENT_DIR,
             "experiment_type": str(experiment_type),
+            "name_prefix": prefix,
+            "image_tag": self.image_tag(experiment_type),
         }
 
+    def _idle_vars(
+        self, experiment_type: ExperimentType, cluster_size: int
+    ) -> dict:
+        """
+        Variables of an environment whose VMs only idle, the pool starts the
+        actual containers over ssh.
+        """
+        idle_cmd = ["sleep", "infinity"]
+        return {
+            "client_cmd": json.dumps(idle_cmd),
+            "server_cmds": json.dumps([idle_cmd] * cluster_size),
+            "project_id": PROJECT_ID,
+            "cluster_size": cluster_size,
+            "experiment_dir": EXPERIMENT_DIR,
+            "experiment_type": str(experiment_type),
+            "name_prefix": self.prefix(experiment_type),
+            "image_tag": self.image_tag(experiment_type),
+        }
+
+    def _run(
+        self,
+        action: str,
+        experiment_type: ExperimentType,
+        tf_vars: dict,
+        *args: str,
+    ):
+        cmd = ["terraform", action, "-auto-approve", *args] + [
+            f"-var={k}={v}" for k, v in tf_vars.items()
+        ]
+        subprocess.run(
+            cmd, cwd=TF_DIR, env=self._env(experiment_type), check=True
+        )
+
     def apply(
         self,
         experiment_type: ExperimentType,
@@ -93,10 +176,7 @@ class TerraformManager:
         config: WorkloadConfig,
     ):
         tf_vars = self._build_vars(experiment_type, cluster_size, seed, config)
-        cmd = ["terraform", "apply", "-auto-approve"] + [
-            f"-var={k}={v}" for k, v in tf_vars.items()
-        ]
-        subprocess.run(cmd, cwd=TF_DIR, check=True)
+        self._run("apply", experiment_type, tf_vars)
 
     def destroy(
         self,
@@ -106,57 +186,106 @@ class TerraformManager:
         config: WorkloadConfig,
     ):
         tf_vars = self._build_vars(experiment_type, cluster_size, seed, config)
-        cmd = ["terraform", "destroy", "-auto-approve"] + [
-            f"-var={k}={v}" for k, v in tf_vars.items()
-        ]
-        subprocess.run(cmd, cwd=TF_DIR, check=True)
+        self._run("destroy", experiment_type, tf_vars)
 
-    def wait_for_experiment_state(
+    def provision(
         self,
         experiment_type: ExperimentType,
-        config: WorkloadConfig,
-        target_state: str,
+        cluster_size: int,
+        replace: tuple[str, ...] = (),
     ):
-        duration = convert_duration(config.duration)
-        retries = 20
-        wait = 30
-
-        probe_server = "client"
-        zone = "us-central1-a"
-        image_name = (
-            f"us-central1-docker.pkg.dev/{PROJECT_ID}/"
-            f"docker-registry/crdb-experiment-{str(experiment_type)}"
-        )
+        """
+        Bring up idle VMs, recreating the resources at the `replace`
+        addresses even if they exist.
+        """
+        tf_vars = self._idle_vars(experiment_type, cluster_size)
+        args = [f"-replace={address}" for address in replace]
+        self._run("apply", experiment_type, tf_vars, *args)
 
-        # Command to check if the container is running or exited
-        if target_state == "start":
-            probe_cmd = f"docker ps --filter 'ancestor={image_name}' -q"
-        elif target_state == "end":
-            time.sleep(duration)
-            probe_cmd = f"docker ps -a --filter 'ancestor={image_name}' --filter 'status=exited' -q"
-        else:
-            raise ValueError("target_state must be 'start' or 'end'")
+    def teardown(self, experiment_type: ExperimentType, cluster_size: int):
+        tf_vars = self._idle_vars(experiment_type, cluster_size)
+        self._run("destroy", experiment_type, tf_vars)
 
-        for i in range(retries):
-            cmd = [
+    def _ssh_client(
+        self, experiment_type: ExperimentType, cmd: str
+    ) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [
                 "gcloud",
                 "compute",
                 "ssh",
-                probe_server,
-                f"--zone={zone}",
+                self.node_name(experiment_type, "client"),
+                f"--zone={ZONE}",
                 "--command",
-                probe_cmd,
+                cmd,
                 "--quiet",
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            ],
+            capture_output=True,
+            text=True,
+        )
 
-            if result.stdout.strip() != "":
-                print(f"✅ Experiment reached state: {target_state}")
-                return
+    def wait_for_experiment_state(
+        self,
+        experiment_type: ExperimentType,
+        config: WorkloadConfig,
+        target_state: str,
+    ):
+        image_name = self.image(experiment_type)
+        container = f"$(docker ps -aq --filter 'ancestor={image_name}')"
 
-            time.sleep(wait)
+        if target_state == "start":
+            # The VM pulls the image first, which can take a while
+            wait_until(
+                lambda: self._ssh_client(
+                    experiment_type,
+                    f"docker ps -q --filter 'ancestor={image_name}'",
+                ).stdout.strip()
+                != "",
+                "Workload container start",
+                timeout=START_TIMEOUT,
+                interval=2,
+            )
+        elif target_state == "end":
+            time.sleep(convert_duration(config.duration))
+            # `docker wait` returns the moment the workload exits and prints
+            # its exit code, bounded so that a dropped ssh session is retried
+            exit_codes = []
+
+            def exited() -> bool:
+                code = waited_exit_code(
+                    self._ssh_client(
+                        experiment_type,
+                        f"timeout {WAIT_SLICE} docker wait {container}",
+                    )
+                )
+                if code is None:
+                    return False
+                exit_codes.append(code)
+                return True
 
-    def download(self, name: str, experiment_type: ExperimentType, run: int):
+            wait_until(
+                exited,
+                "Workload container exit",
+                timeout=END_TIMEOUT,
+                interval=WAIT_RETRY,
+            )
+            if exit_codes[-1] != 0:
+                raise RuntimeError(
+                    f"Workload of {experiment_type} exited with "
+                    f"{exit_codes[-1]}"
+                )
+        else:
+            raise ValueError("target_state must be 'start' or 'end'")
+
+        print(f"✅ Experiment reached state: {target_state}")
+
+    def download(
+        self,
+        name: str,
+        experiment_type: ExperimentType,
+        run: int,
+        cluster_size: int,
+    ):
         zone = "us-central1-a"
         remote_files = ["client.txt", "hdrhistograms.json"]
 
@@ -205,30 +334,36 @@ class TerraformManager:
             )
 
         # Get data
-        target_node = "client"
+        target_node = self.node_name(experiment_type, "client")
         remote_experiment_dir = remote_dir(target_node)
         for filename in remote_files:
             local_file = f"{local_data_dir}/{filename}"
             remote_file = f"{remote_experiment_dir}/{filename}"
             try_download(target_node, remote_file, str(local_file))
 
-        # Get logs
-        target_node = "server-3"
-        remote_experiment_dir = remote_dir(target_node)
-        subprocess.run(
-            [
-                "gcloud",
-                "compute",
-                "ssh",
-                "server-3",
-                "--command",
-                f"sudo chown {USER}:{USER} {remote_experiment_dir}/cockroach.log",
-            ],
-            check=True,
-        )
+        # Get the logs of every server, rotated files included. The
+        # `cockroach.log` symlinks are skipped, they only alias a file that
+        # is downloaded anyway.
+        for server in range(1, cluster_size + 1):
+            target_node = self.node_name(experiment_type, f"server-{server}")
+            remote_experiment_dir = remote_dir(target_node)
+            local_node_dir = f"{local_logs_dir}/server-{server}"
+            os.makedirs(local_node_dir, exist_ok=True)
+            subprocess.run(
+                [
+                    "gcloud",
+                    "compute",
+                    "ssh",
+                    target_node,
+                    "--command",
+                    f"sudo chown {USER}:{USER} "
+                    f"{remote_experiment_dir}/cockroach*.log",
+                ],
+                check=True,
+            )
 
-        try_download(
-            target_node,
-            f"{remote_experiment_dir}/cockroach.log",
-            local_logs_dir,
-        )
+            try_download(
+                target_node,
+                f"{remote_experiment_dir}/cockroach*.*.log",
+                local_node_dir,
+            )
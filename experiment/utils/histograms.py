@@ -0,0 +1,299 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, Optional
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from .common import (
+    EXPERIMENT_TYPE_MAP,
+    ExperimentType,
+    get_local_output_dir,
+)
+from .client_data import parse_time
+from .plotting import PlotJob, plt
+
+QUANTILES = {
+    "p50": 0.5,
+    "p90": 0.9,
+    "p95": 0.95,
+    "p99": 0.99,
+    "p99.9": 0.999,
+    "p99.99": 0.9999,
+}
+
+# Latencies are recorded in nanoseconds
+NS_PER_MS = 1e6
+
+
+@lru_cache(maxsize=None)
+def _layout(lowest: int, highest: int, sig_figs: int) -> tuple[int, int]:
+    """
+    Return (unit magnitude, sub bucket half count magnitude) of an
+    HdrHistogram, following hdrhistogram-go's `New`.
+    """
+    largest_single_unit = 2 * 10**sig_figs
+    sub_bucket_count_magnitude = int(np.ceil(np.log2(largest_single_unit)))
+    half_count_magnitude = max(sub_bucket_count_magnitude, 1) - 1
+    unit_magnitude = max(int(np.floor(np.log2(lowest))), 0)
+    return unit_magnitude, half_count_magnitude
+
+
+@lru_cache(maxsize=None)
+def _bucket_bounds(
+    lowest: int, highest: int, sig_figs: int, length: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Lowest and highest equivalent value of every counts index."""
+    unit_magnitude, half_magnitude = _layout(lowest, highest, sig_figs)
+    half_count = 1 << half_magnitude
+    sub_bucket_count = half_count << 1
+
+    idx = np.arange(length, dtype=np.int64)
+    bucket = np.maximum((idx >> half_magnitude) - 1, 0)
+    sub_bucket = np.where(
+        idx < sub_bucket_count, idx, (idx & (half_count - 1)) + half_count
+    )
+    shift = bucket + unit_magnitude
+    low = sub_bucket << shift
+    high = low + (np.int64(1) << shift) - 1
+    low.setflags(write=False)
+    high.setflags(write=False)
+    return low, high
+
+
+@dataclass
+class Histogram:
+    """
+    Counts of an HdrHistogram snapshot as written by
+    `cockroach workload run --histograms`.
+
+    Histograms with the same layout merge by adding their counts, so pooling
+    runs or ticks is exact up to the histogram's precision.
+    """
+
+    lowest: int
+    highest: int
+    sig_figs: int
+    counts: np.ndarray
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "Histogram":
+        return cls(
+            snapshot["LowestTrackableValue"],
+            snapshot["HighestTrackableValue"],
+            snapshot["SignificantFigures"],
+            np.asarray(snapshot["Counts"], dtype=np.int64),
+        )
+
+    def _key(self) -> tuple[int, int, int]:
+        return self.lowest, self.highest, self.sig_figs
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        if self._key() != other._key():
+            raise ValueError(
+                f"Cannot merge histograms with layouts {self._key()} and "
+                f"{other._key()}"
+            )
+        length = max(len(self.counts), len(other.counts))
+        counts = np.zeros(length, dtype=np.int64)
+        counts[: len(self.counts)] += self.counts
+        counts[: len(other.counts)] += other.counts
+        return Histogram(self.lowest, self.highest, self.sig_figs, counts)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def _bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        return _bucket_bounds(*self._key(), len(self.counts))
+
+    def mean(self) -> float:
+        """Mean latency in ms, taking the middle of every bucket."""
+        low, high = self._bounds()
+        mid = low + (high - low + 1) // 2
+        return float((self.counts * mid).sum() / self.total / NS_PER_MS)
+
+    def value_at_quantiles(self, quantiles) -> np.ndarray:
+        """
+        Latencies in ms at the given quantiles (0-1), matching
+        hdrhistogram-go's `ValueAtQuantile`.
+        """
+        quantiles = np.clip(np.asarray(quantiles, dtype=float), 0, 1)
+        cumulative = np.cumsum(self.counts)
+        targets = np.maximum(np.floor(quantiles * self.total + 0.5), 1)
+        idx = np.searchsorted(cumulative, targets, side="left")
+        _, high = self._bounds()
+        return high[np.minimum(idx, len(high) - 1)] / NS_PER_MS
+
+    def tail(self) -> pd.DataFrame:
+        """
+        Complementary CDF: the share of requests slower than each latency.
+        """
+        _, high = self._bounds()
+        recorded = self.counts > 0
+        cumulative = np.cumsum(self.counts)[recorded]
+        return pd.DataFrame(
+            {
+                "latency": high[recorded] / NS_PER_MS,
+                "ccdf": 1 - cumulative / self.total,
+            }
+        )
+
+
+def iter_ticks(filepath: str) -> Iterator[tuple[str, float, Histogram]]:
+    """
+    Yield (operation, seconds since the first tick, histogram) for every
+    per-tick snapshot of a hdrhistograms.json file.
+    """
+    start = None
+    with open(filepath, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            tick = json.loads(line)
+            now = parse_time(tick["Now"])
+            if start is None:
+                start = now
+            elapsed = (now - start).total_seconds()
+            yield tick["Name"], elapsed, Histogram.from_snapshot(tick["Hist"])
+
+
+def load_histograms(
+    filepath: str, start: float = 0, end: Optional[float] = None
+) -> dict[str, Histogram]:
+    """
+    Merge the ticks of each operation inside the [start, end) window, given
+    in seconds since the first tick.
+    """
+    merged = {}
+    for name, elapsed, hist in iter_ticks(filepath):
+        if elapsed < start:
+            continue
+        if end is not None and elapsed >= end:
+            break
+        merged[name] = merged[name].merge(hist) if name in merged else hist
+    return merged
+
+
+def merge_histograms(
+    histograms: list[dict[str, Histogram]],
+) -> dict[str, Histogram]:
+    """Pool the per-operation histograms of several runs."""
+    pooled = {}
+    for run in histograms:
+        for name, hist in run.items():
+            pooled[name] = pooled[name].merge(hist) if name in pooled else hist
+    return pooled
+
+
+def _get_histograms(
+    name: str,
+    sample_size: int,
+    exp_type: ExperimentType,
+    start: float,
+    end: Optional[float],
+) -> dict[str, Histogram]:
+    runs = []
+    for i in range(1, sample_size + 1):
+        local_output_dir = get_local_output_dir(name, i, exp_type)
+        filepath = f"{local_output_dir}/data/hdrhistograms.json"
+        if not os.path.exists(filepath):
+            print(f"⚠️ Missing {filepath}, skipping")
+            continue
+        runs.append(load_histograms(filepath, start, end))
+    return merge_histograms(runs)
+
+
+def _summarize(pooled: dict[str, dict[str, Histogram]]) -> pd.DataFrame:
+    rows = []
+    for exp_type, histograms in pooled.items():
+        for op, hist in sorted(histograms.items()):
+            if hist.total == 0:
+                continue
+            values = hist.value_at_quantiles([*QUANTILES.values(), 1])
+            row = {
+                "operation": op.capitalize(),
+                "experiment_type": exp_type,
+                "count": hist.total,
+                "mean": round(hist.mean(), 3),
+            }
+            row.update(
+                {q: round(v, 3) for q, v in zip(QUANTILES, values[:-1])}
+            )
+            row["max"] = round(values[-1], 3)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _draw_tail(tails: pd.DataFrame, op: str) -> Figure:
+    fig, ax = plt.subplots(figsize=(10, 6))
+    # The last bucket has a ccdf of 0 which cannot be drawn on a log scale
+    tails = tails[tails["ccdf"] > 0]
+    for exp_type, tail in tails.groupby("experiment_type", sort=False):
+        ax.step(tail["latency"], tail["ccdf"], where="post", label=exp_type)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_title(f"Latency Tail of {op.capitalize()}")
+    ax.set_xlabel("Latency (ms)")
+    ax.set_ylabel("Fraction of Requests Slower")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend(title="Experiment Type")
+    fig.tight_layout()
+    return fig
+
+
+def run(
+    name: str,
+    sample_size: int,
+    output_dir: str,
+    start: float = 0,
+    end: Optional[float] = None,
+) -> list[PlotJob]:
+    """
+    Pool the histograms of all runs per experiment type and write exact
+    quantiles and tail CDFs for baseline vs thesis. Returns the tail plots
+    still to be rendered.
+    """
+    pooled = {}
+    for exp_type in (ExperimentType.BASELINE, ExperimentType.THESIS):
+        histograms = _get_histograms(name, sample_size, exp_type, start, end)
+        pooled[EXPERIMENT_TYPE_MAP[str(exp_type)]] = histograms
+
+    summary = _summarize(pooled)
+    if summary.empty:
+        print("⚠️ No histograms found, skipping histogram analysis")
+        return []
+
+    output_file = f"{output_dir}/hist-quantiles.csv"
+    summary.to_csv(output_file, index=False)
+    print(f"Results written to: {output_file}")
+
+    jobs = []
+    # Operations without a request in the window have no tail to plot
+    ops = sorted(
+        {
+            op
+            for histograms in pooled.values()
+            for op, hist in histograms.items()
+            if hist.total > 0
+        }
+    )
+    for op in ops:
+        tails = {
+            exp_type: histograms[op].tail()
+            for exp_type, histograms in pooled.items()
+            if op in histograms and histograms[op].total > 0
+        }
+        tails = (
+            pd.concat(tails, names=["experiment_type"])
+            .droplevel(1)
+            .reset_index()
+        )
+        tails.to_csv(f"{output_dir}/tail-{op}.csv", index=False)
+        jobs.append(
+            PlotJob(_draw_tail, f"{output_dir}/tail-{op}", tails, {"op": op})
+        )
+
+    return jobs
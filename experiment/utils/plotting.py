@@ -0,0 +1,135 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+import matplotlib
+
+# Never open a window, plots are only written to disk
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+FINGERPRINT_SUFFIX = ".fingerprint"
+
+
+@dataclass
+class PlotJob:
+    """
+    A figure to render: `draw(data, **params)` must be a module level
+    function returning the figure, which is saved as `path.<format>`.
+    """
+
+    draw: Callable[..., Figure]
+    path: str
+    data: pd.DataFrame
+    params: dict = field(default_factory=dict)
+    formats: tuple[str, ...] = ("pdf",)
+    dpi: int = 300
+
+    def outputs(self) -> list[str]:
+        return [f"{self.path}.{fmt}" for fmt in self.formats]
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        digest.update(
+            pd.util.hash_pandas_object(self.data, index=True).values.tobytes()
+        )
+        digest.update(repr(list(self.data.columns)).encode())
+        digest.update(repr(sorted(self.params.items())).encode())
+        digest.update(
+            f"{self.draw.__module__}.{self.draw.__qualname__}".encode()
+        )
+        digest.update(repr((self.formats, self.dpi)).encode())
+        return digest.hexdigest()
+
+
+def _fingerprint_path(path: str) -> str:
+    directory, base = os.path.split(path)
+    return os.path.join(directory, f".{base}{FINGERPRINT_SUFFIX}")
+
+
+def _is_fresh(job: PlotJob, digest: str) -> bool:
+    if not all(os.path.exists(path) for path in job.outputs()):
+        return False
+    try:
+        with open(_fingerprint_path(job.path), "r") as f:
+            return f.read().strip() == digest
+    except OSError:
+        return False
+
+
+def save(fig: Figure, path: str, formats=("pdf",), dpi: int = 300):
+    """Save a figure in every format and release it."""
+    try:
+        for fmt in formats:
+            fig.savefig(
+                f"{path}.{fmt}", format=fmt, dpi=dpi, bbox_inches="tight"
+            )
+    finally:
+        plt.close(fig)
+
+
+def _render(job: PlotJob):
+    save(job.draw(job.data, **job.params), job.path, job.formats, job.dpi)
+
+
+def draw_boxplot(
+    df: pd.DataFrame, metric_col: str, title: str, ylabel: str
+) -> Figure:
+    """
+    Boxplot of a metric per operation type, split by experiment type.
+
+    Parameters:
+    - df: pandas DataFrame containing at least ['type', 'experiment_type',
+                                                metric_col]
+    - metric_col: string, the column to plot (e.g., 'p50l', 'p95l', 'p99l')
+    """
+    with sns.axes_style("whitegrid"):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        sns.boxplot(
+            data=df,
+            x="type",
+            y=metric_col,
+            hue="experiment_type",
+            palette="Set2",
+            ax=ax,
+        )
+
+    ax.set_title(title)
+    ax.set_ylabel(ylabel)
+    ax.set_xlabel("Operation Type")
+    ax.legend(title="Experiment Type")
+    fig.tight_layout()
+    return fig
+
+
+def render(jobs: list[PlotJob], workers: int = 1):
+    """
+    Render the jobs whose data changed since they were last drawn, in a
+    process pool when more than one worker is requested.
+    """
+    pending = []
+    for job in jobs:
+        digest = job.fingerprint()
+        if _is_fresh(job, digest):
+            print(f"⏭️ {job.path} is up to date")
+            continue
+        pending.append((job, digest))
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(pending) <= 1:
+        for job, _ in pending:
+            _render(job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render, [job for job, _ in pending]))
+
+    for job, digest in pending:
+        with open(_fingerprint_path(job.path), "w") as f:
+            f.write(digest)
@@ -0,0 +1,109 @@
+from math import comb
+from itertools import combinations
+import numpy as np
+
+N_RESAMPLES = 10_000
+SEED = 42
+CONFIDENCE = 0.95
+
+# Upper bound on the elements of one (cells, resamples, samples) block, keeps
+# a batch at roughly 128 MiB of float64
+_MAX_BLOCK = 1 << 24
+
+
+def _chunks(n_cells: int, per_cell: int):
+    step = max(1, _MAX_BLOCK // max(per_cell, 1))
+    for start in range(0, n_cells, step):
+        yield slice(start, start + step)
+
+
+def bootstrap(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_resamples: int = N_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    seed: int = SEED,
+) -> dict[str, np.ndarray]:
+    """
+    Percentile bootstrap confidence intervals of the thesis minus baseline
+    mean and median differences for each row of `x` (baseline) and `y`
+    (thesis).
+
+    All rows share one (resamples, samples) index matrix per group, so the
+    resamples are drawn as a single array instead of one at a time.
+    """
+    rng = np.random.default_rng(seed)
+    nx, ny = x.shape[-1], y.shape[-1]
+    idx_x = rng.integers(0, nx, size=(n_resamples, nx))
+    idx_y = rng.integers(0, ny, size=(n_resamples, ny))
+    bounds = [(1 - confidence) / 2, (1 + confidence) / 2]
+
+    mean_ci = np.empty((len(x), 2))
+    median_ci = np.empty((len(x), 2))
+    for rows in _chunks(len(x), n_resamples * max(nx, ny)):
+        xs, ys = x[rows][:, idx_x], y[rows][:, idx_y]
+        mean_diff = ys.mean(axis=-1) - xs.mean(axis=-1)
+        median_diff = np.median(ys, axis=-1) - np.median(xs, axis=-1)
+        mean_ci[rows] = np.quantile(mean_diff, bounds, axis=-1).T
+        median_ci[rows] = np.quantile(median_diff, bounds, axis=-1).T
+
+    return {
+        "mean_diff": y.mean(axis=-1) - x.mean(axis=-1),
+        "mean_diff_ci_low": mean_ci[:, 0],
+        "mean_diff_ci_high": mean_ci[:, 1],
+        "median_diff": np.median(y, axis=-1) - np.median(x, axis=-1),
+        "median_diff_ci_low": median_ci[:, 0],
+        "median_diff_ci_high": median_ci[:, 1],
+    }
+
+
+def permutation_test(
+    x: np.ndarray,
+    y: np.ndarray,
+    alternative: str = "two-sided",
+    n_resamples: int = N_RESAMPLES,
+    seed: int = SEED,
+) -> np.ndarray:
+    """
+    Permutation p-values of the difference in means of `y` against `x` for
+    each row.
+
+    If there are no more distinct splits of the pooled samples than
+    `n_resamples` all of them are enumerated and the p-value is exact,
+    otherwise random permutations are used.
+    """
+    nx, ny = x.shape[-1], y.shape[-1]
+    n = nx + ny
+    pooled = np.concatenate([x, y], axis=-1)
+    totals = pooled.sum(axis=-1, keepdims=True)
+    observed = y.mean(axis=-1) - x.mean(axis=-1)
+
+    exact = comb(n, nx) <= n_resamples
+    if exact:
+        idx_x = np.array(list(combinations(range(n), nx)))
+    else:
+        rng = np.random.default_rng(seed)
+        idx_x = np.argsort(rng.random((n_resamples, n)), axis=-1)[:, :nx]
+
+    p_values = np.empty(len(x))
+    for rows in _chunks(len(x), len(idx_x) * nx):
+        sum_x = pooled[rows][:, idx_x].sum(axis=-1)
+        stats = (totals[rows] - sum_x) / ny - sum_x / nx
+
+        obs = observed[rows, None]
+        # Tolerate rounding so that the observed split counts as extreme
+        tol = 1e-9 * np.maximum(np.abs(obs), 1)
+        if alternative == "greater":
+            extreme = stats >= obs - tol
+        elif alternative == "less":
+            extreme = stats <= obs + tol
+        else:
+            extreme = np.abs(stats) >= np.abs(obs) - tol
+
+        hits = extreme.sum(axis=-1)
+        if exact:
+            p_values[rows] = hits / len(idx_x)
+        else:
+            p_values[rows] = (hits + 1) / (len(idx_x) + 1)
+
+    return p_values
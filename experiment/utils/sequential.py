@@ -0,0 +1,136 @@
+import os
+from dataclasses import dataclass, field
+from enum import Enum
+import numpy as np
+import pandas as pd
+from scipy.stats import norm, ttest_ind
+from . import analysis
+
+ALPHA = 0.05
+# Stop for futility once the chance of a significant final result, assuming
+# the current trend continues, drops below this
+FUTILITY_POWER = 0.1
+# Pairs to collect before the first look
+MIN_SAMPLES = 5
+PRIMARY_METRIC = "avgl"
+
+
+class Decision(str, Enum):
+    CONTINUE = "continue"
+    EFFICACY = "efficacy"
+    FUTILITY = "futility"
+
+    def __str__(self):
+        return self.value
+
+
+def obrien_fleming_spending(t: float, alpha: float = ALPHA) -> float:
+    """
+    Lan-DeMets alpha spending function approximating O'Brien-Fleming
+    boundaries: the one-sided alpha spent up to information fraction `t`.
+    """
+    if t <= 0:
+        return 0.0
+    return float(2 * (1 - norm.cdf(norm.ppf(1 - alpha / 2) / np.sqrt(t))))
+
+
+def conditional_power(z: np.ndarray, t: float, alpha: float = ALPHA):
+    """
+    Probability of crossing the final one-sided boundary if the current
+    trend continues (Lan and Wittes' B-value formulation).
+    """
+    if t >= 1:
+        return (z >= norm.ppf(1 - alpha)).astype(float)
+    b = z * np.sqrt(t)
+    drift = z / np.sqrt(t)
+    return 1 - norm.cdf(
+        (norm.ppf(1 - alpha) - b - drift * (1 - t)) / np.sqrt(1 - t)
+    )
+
+
+@dataclass
+class SequentialDesign:
+    """
+    Group-sequential test of the primary metric after every
+    baseline/thesis pair, up to `max_samples` pairs.
+
+    Each look tests at the alpha spent since the previous look, which by the
+    union bound keeps the overall type I error at `alpha` for any number and
+    timing of looks. Efficacy needs every operation to be significant
+    (intersection-union), so no further correction across operations is
+    needed. Futility stopping is non-binding and cannot inflate alpha.
+    """
+
+    max_samples: int
+    metric: str = PRIMARY_METRIC
+    alpha: float = ALPHA
+    futility_power: float = FUTILITY_POWER
+    min_samples: int = MIN_SAMPLES
+    spent: float = 0.0
+    history: list[dict] = field(default_factory=list)
+
+    def look(self, df: pd.DataFrame, n: int) -> Decision:
+        """Decide after `n` pairs given their final rows as analysis loads them."""
+        if n < self.min_samples:
+            return Decision.CONTINUE
+
+        t = min(n / self.max_samples, 1.0)
+        level = obrien_fleming_spending(t, self.alpha) - self.spent
+        self.spent += level
+
+        direction = analysis.DIRECTIONS.get(self.metric, "greater")
+        p_values = {}
+        for op, df_op in df.groupby("type", sort=False):
+            baseline = df_op[df_op["experiment_type"] == "CRDB"][self.metric]
+            thesis = df_op[df_op["experiment_type"] == "DO-CRDB"][self.metric]
+            _, p_val = ttest_ind(
+                thesis.dropna(),
+                baseline.dropna(),
+                equal_var=False,
+                alternative=direction,
+            )
+            p_values[op] = p_val
+
+        p = np.array(list(p_values.values()))
+        z = norm.ppf(1 - np.clip(p, 1e-12, 1 - 1e-12))
+        power = conditional_power(z, t, self.alpha)
+
+        if np.all(p <= level):
+            decision = Decision.EFFICACY
+        elif t < 1 and np.any(power < self.futility_power):
+            decision = Decision.FUTILITY
+        else:
+            decision = Decision.CONTINUE
+
+        for (op, p_val), cp in zip(p_values.items(), power):
+            self.history.append(
+                {
+                    "samples": n,
+                    "information": round(t, 3),
+                    "level": level,
+                    "operation": op,
+                    "p_value": p_val,
+                    "conditional_power": round(cp, 3),
+                    "decision": str(decision),
+                }
+            )
+        print(
+            f"📏 Look at {n}/{self.max_samples} pairs: {decision} "
+            f"(level {level:.2e}, p-values "
+            + ", ".join(f"{op}={p:.5f}" for op, p in p_values.items())
+            + ")"
+        )
+        return decision
+
+    def look_at_runs(self, name: str, n: int) -> Decision:
+        """Load the first `n` runs of an experiment and look at them."""
+        if n < self.min_samples:
+            return Decision.CONTINUE
+        return self.look(analysis.load(name, n), n)
+
+    def save(self, name: str):
+        output_dir = f"./runs/{name}/results"
+        os.makedirs(output_dir, exist_ok=True)
+        pd.DataFrame(self.history).to_csv(
+            f"{output_dir}/sequential.csv", index=False
+        )
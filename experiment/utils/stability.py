@@ -0,0 +1,156 @@
+import os
+import pandas as pd
+from . import statistics
+from .cache import cached_frame
+from .client_data import read_frame
+from .common import (
+    EXPERIMENT_TYPE_MAP,
+    STABILITY_WINDOW,
+    ExperimentType,
+    get_local_output_dir,
+    map_in_parallel,
+)
+from .plotting import PlotJob, draw_boxplot, render
+from .resampling import N_RESAMPLES
+from .steady_state import steady_state_start
+
+METRICS = [
+    "throughput",
+    "throughput_cv",
+    "worst_throughput",
+    "p99",
+    "p99_cv",
+    "worst_p99",
+]
+
+DIRECTIONS = {
+    "throughput": "greater",
+    "throughput_cv": "less",
+    "worst_throughput": "greater",
+    "p99": "less",
+    "p99_cv": "less",
+    "worst_p99": "less",
+}
+
+LABEL_MAPPING = {
+    "throughput": ("Steady-State Throughput", "ops/s"),
+    "throughput_cv": ("Throughput Coefficient of Variation", "CV"),
+    "worst_throughput": ("Worst-Window Throughput", "ops/s"),
+    "p99": ("Median Window 99th Percentile Latency", "ms"),
+    "p99_cv": ("99th Percentile Latency Coefficient of Variation", "CV"),
+    "worst_p99": ("Worst-Window 99th Percentile Latency", "ms"),
+}
+
+
+def _cv(values: pd.Series) -> float:
+    if len(values) < 2:
+        return float("nan")
+    return float(values.std(ddof=1) / values.mean())
+
+
+def window_metrics(df: pd.DataFrame, window: float = STABILITY_WINDOW) -> dict:
+    """
+    Cut the steady state of one operation's time series into windows and
+    describe how stable throughput and tail latency are across them.
+
+    Window throughput is the mean of the per-tick `avgt`, window p99 the
+    worst per-tick `p99l` inside the window.
+    """
+    start = steady_state_start(df)
+    steady = df[df["time"] >= start]
+    windows = steady.groupby((steady["time"] - start) // window)
+
+    throughput = windows["avgt"].mean()
+    p99 = windows["p99l"].max()
+
+    # A trailing window with only a few ticks would skew the extremes
+    ticks = windows.size()
+    full = ticks >= ticks.median() / 2
+    throughput, p99 = throughput[full], p99[full]
+
+    return {
+        "warmup": start,
+        "windows": len(throughput),
+        "throughput": throughput.mean(),
+        "throughput_cv": _cv(throughput),
+        "worst_throughput": throughput.min(),
+        "p99": p99.median(),
+        "p99_cv": _cv(p99),
+        "worst_p99": p99.max(),
+    }
+
+
+def _load_data(
+    name: str,
+    run: int,
+    exp_type: ExperimentType,
+    window: float,
+    cache: bool = True,
+) -> pd.DataFrame:
+    """Stability metrics of every operation of a single run."""
+    local_output_dir = get_local_output_dir(name, run, exp_type)
+    filepath = f"{local_output_dir}/data/client.txt"
+    if cache:
+        df = cached_frame(filepath, "frame", read_frame)
+    else:
+        df = read_frame(filepath)
+
+    rows = []
+    for op, df_op in df.groupby("type", sort=False):
+        rows.append(
+            {
+                "run": run,
+                "type": op.capitalize(),
+                "experiment_type": EXPERIMENT_TYPE_MAP[str(exp_type)],
+                **window_metrics(df_op, window),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def run(
+    name: str,
+    sample_size: int,
+    window: float = STABILITY_WINDOW,
+    cache: bool = True,
+    workers: int = 1,
+    resamples: int = N_RESAMPLES,
+) -> pd.DataFrame:
+    """
+    Compare baseline and thesis on the stability of their steady state
+    instead of their end-of-run averages.
+    """
+    tasks = [
+        (name, i, exp_type, window, cache)
+        for exp_type in (ExperimentType.BASELINE, ExperimentType.THESIS)
+        for i in range(1, sample_size + 1)
+    ]
+    result = pd.concat(
+        map_in_parallel(_load_data, tasks, workers), ignore_index=True
+    )
+
+    output_dir = f"./runs/{name}/results/stability"
+    os.makedirs(output_dir, exist_ok=True)
+    result.to_csv(f"{output_dir}/stability.csv", index=False)
+
+    statistics.write_results(
+        output_dir, result, METRICS, DIRECTIONS, resamples
+    )
+
+    jobs = [
+        PlotJob(
+            draw_boxplot,
+            f"{output_dir}/{metric}",
+            result[["type", "experiment_type", metric]],
+            {
+                "metric_col": metric,
+                "title": f"{LABEL_MAPPING[metric][0]} by Operation and "
+                "Experiment Type",
+                "ylabel": LABEL_MAPPING[metric][1],
+            },
+        )
+        for metric in METRICS
+    ]
+    render(jobs, workers)
+
+    return result
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import shapiro, ttest_ind, mannwhitneyu
+from . import resampling
+
+BASELINE_LABEL = "CRDB"
+THESIS_LABEL = "DO-CRDB"
+
+# Shapiro-Wilk needs at least three observations
+MIN_SAMPLES = 3
+NORMALITY_ALPHA = 0.05
+
+
+COLUMNS = [
+    "operation",
+    "metric",
+    "test",
+    "p_value",
+    "cohens_d",
+    "baseline_mean",
+    "thesis_mean",
+    "n_baseline",
+    "n_thesis",
+]
+
+RESAMPLING_COLUMNS = [
+    "mean_diff",
+    "mean_diff_ci_low",
+    "mean_diff_ci_high",
+    "median_diff",
+    "median_diff_ci_low",
+    "median_diff_ci_high",
+    "perm_p_value",
+]
+
+
+def stack_samples(
+    df: pd.DataFrame, metrics: list[str], label: str
+) -> tuple[list[str], np.ndarray]:
+    """
+    Stack the samples of one experiment type into an array of shape
+    (operations, metrics, samples), padded with NaN.
+    """
+    ops = list(df["type"].unique())
+    group = df[df["experiment_type"] == label]
+    sample = group.groupby("type").cumcount()
+    n_samples = int(sample.max()) + 1 if len(sample) else 0
+
+    wide = (
+        group.set_index(["type", sample.rename("sample")])[metrics]
+        .unstack("sample")
+        .reindex(
+            index=ops,
+            columns=pd.MultiIndex.from_product([metrics, range(n_samples)]),
+        )
+    )
+    values = wide.to_numpy(dtype=float)
+    return ops, values.reshape(len(ops), len(metrics), n_samples)
+
+
+def cohens_d(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Cohen's d of y against x along the last axis."""
+    nx, ny = x.shape[-1], y.shape[-1]
+    pooled_std = np.sqrt(
+        (
+            (nx - 1) * np.var(x, axis=-1, ddof=1)
+            + (ny - 1) * np.var(y, axis=-1, ddof=1)
+        )
+        / (nx + ny - 2)
+    )
+    return (np.mean(y, axis=-1) - np.mean(x, axis=-1)) / pooled_std
+
+
+def compare_batch(
+    x: np.ndarray, y: np.ndarray, alternative: str
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compare baseline rows `x` with thesis rows `y` in one batch.
+
+    Each row uses a t-test if both samples pass Shapiro-Wilk and a
+    Mann-Whitney U test otherwise. Returns (use t-test, p-values, Cohen's d).
+    """
+    _, p_x = shapiro(x, axis=-1)
+    _, p_y = shapiro(y, axis=-1)
+    use_t = (p_x > NORMALITY_ALPHA) & (p_y > NORMALITY_ALPHA)
+
+    _, p_t = ttest_ind(y, x, alternative=alternative, axis=-1)
+    _, p_u = mannwhitneyu(y, x, alternative=alternative, axis=-1)
+
+    return use_t, np.where(use_t, p_t, p_u), cohens_d(x, y)
+
+
+def compare(
+    df: pd.DataFrame,
+    metrics: list[str],
+    directions: dict[str, str],
+    resamples: int = 0,
+) -> pd.DataFrame:
+    """
+    Test baseline against thesis for every operation and metric at once.
+
+    Cells are batched by sample sizes and alternative, so each scipy test is
+    called once per batch instead of once per cell. With `resamples` set,
+    bootstrap confidence intervals of the differences and permutation
+    p-values are added as well.
+    """
+    ops, baseline = stack_samples(df, metrics, BASELINE_LABEL)
+    _, thesis = stack_samples(df, metrics, THESIS_LABEL)
+
+    batches = {}
+    for o in range(len(ops)):
+        for m, metric in enumerate(metrics):
+            x = baseline[o, m][~np.isnan(baseline[o, m])]
+            y = thesis[o, m][~np.isnan(thesis[o, m])]
+            if len(x) < MIN_SAMPLES or len(y) < MIN_SAMPLES:
+                continue
+            alternative = directions.get(metric, "two-sided")
+            key = (len(x), len(y), alternative)
+            batches.setdefault(key, []).append((o, m, x, y))
+
+    rows = []
+    for (_, _, alternative), cells in batches.items():
+        x = np.stack([cell[2] for cell in cells])
+        y = np.stack([cell[3] for cell in cells])
+        use_t, p_vals, ds = compare_batch(x, y, alternative)
+        x_means, y_means = x.mean(axis=-1), y.mean(axis=-1)
+
+        resampled = {}
+        if resamples:
+            resampled = resampling.bootstrap(x, y, resamples)
+            resampled["perm_p_value"] = resampling.permutation_test(
+                x, y, alternative, resamples
+            )
+
+        for i, (o, m, _, _) in enumerate(cells):
+            row = {
+                "operation": ops[o],
+                "metric": metrics[m],
+                "test": "t-test" if use_t[i] else "Mann-Whitney U",
+                "p_value": round(p_vals[i], 5),
+                "cohens_d": round(ds[i], 3),
+                "baseline_mean": round(x_means[i], 3),
+                "thesis_mean": round(y_means[i], 3),
+                "n_baseline": x.shape[-1],
+                "n_thesis": y.shape[-1],
+                "_metric": m,
+                "_op": o,
+            }
+            for col, values in resampled.items():
+                row[col] = round(
+                    values[i], 5 if col.endswith("p_value") else 3
+                )
+            rows.append(row)
+
+    columns = [*COLUMNS, *(RESAMPLING_COLUMNS if resamples else [])]
+
+    # Restore the metric-major, operation-minor order of the cells
+    results = pd.DataFrame(rows, columns=[*columns, "_metric", "_op"])
+    return (
+        results.sort_values(["_metric", "_op"])
+        .drop(columns=["_metric", "_op"])
+        .reset_index(drop=True)
+    )
+
+
+def summarize(df: pd.DataFrame, metrics: list[str]) -> pd.DataFrame:
+    """
+    Five-number summary (min, q1, median, q3, max) of every metric, grouped
+    by experiment type and operation. Columns are (metric, statistic).
+    """
+    summary = (
+        df.groupby(["experiment_type", "type"])[metrics]
+        .quantile([0, 0.25, 0.5, 0.75, 1])
+        .unstack()
+    )
+    return summary.rename(
+        columns={0: "min", 0.25: "q1", 0.5: "median", 0.75: "q3", 1: "max"},
+        level=1,
+    )
+
+
+def write_results(
+    output_dir: str,
+    df: pd.DataFrame,
+    metrics: list[str],
+    directions: dict[str, str],
+    resamples: int = 0,
+):
+    """
+    Compute the significance tests and the boxplot summaries of all metrics
+    in a single pass and write one test and one summary CSV per metric.
+    """
+    tests = compare(df, metrics, directions, resamples)
+    summary = summarize(df, metrics)
+
+    for metric in metrics:
+        output_file = f"{output_dir}/test-{metric}.csv"
+        tests[tests["metric"] == metric].to_csv(output_file, index=False)
+        print(f"Results written to: {output_file}")
+
+        summary[metric].to_csv(f"{output_dir}/{metric}.csv")
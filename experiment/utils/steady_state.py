@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+# Batch size of MSER-5, the common choice that smooths tick-to-tick noise
+# without hiding the transient
+MSER_BATCH = 5
+
+
+def mser_truncation(values: np.ndarray, batch: int = MSER_BATCH) -> int:
+    """
+    Number of leading observations to drop so that the rest is in steady
+    state, using the MSER-m rule (White, 1997).
+
+    The series is cut into batch means and the truncation point minimizes
+    the squared standard error of the remaining mean. Only the first half
+    is considered, as the rule is unreliable close to the end.
+    """
+    values = np.asarray(values, dtype=float)
+    k = len(values) // batch
+    if k < 2:
+        return 0
+
+    means = values[: k * batch].reshape(k, batch).mean(axis=1)
+    # Suffix sums give the statistic of every truncation point at once
+    s1 = np.cumsum(means[::-1])[::-1]
+    s2 = np.cumsum((means**2)[::-1])[::-1]
+    n = np.arange(k, 0, -1)
+    stat = (s2 - s1**2 / n) / n**2
+
+    d = int(np.argmin(stat[: k // 2 + 1]))
+    return d * batch
+
+
+def steady_state_start(
+    df: pd.DataFrame, column: str = "avgt", batch: int = MSER_BATCH
+) -> float:
+    """
+    Elapsed time at which the time series of a single operation, as read
+    by `client_data.read_frame`, reaches steady state.
+    """
+    df = df.sort_values("time")
+    d = mser_truncation(df[column].to_numpy(), batch)
+    if d >= len(df):
+        return float(df["time"].iloc[-1])
+    return float(df["time"].iloc[d])
@@ -0,0 +1,231 @@
+import glob
+import os
+import sqlite3
+from contextlib import closing
+from typing import Optional
+import pandas as pd
+from .cache import cached_frame
+from .client_data import NUMERIC_COLUMNS, read_frame, read_last_rows
+from .common import ExperimentType, get_local_output_dir, run_numbers
+from .experiment.journal import Journal
+from .experiment.models import ExperimentConfig, config_path
+
+DB_PATH = "./runs/results.db"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS experiments (
+    name TEXT PRIMARY KEY,
+    deployment_type TEXT NOT NULL,
+    workload TEXT NOT NULL,
+    workload_args TEXT NOT NULL,
+    cluster_size INTEGER NOT NULL,
+    duration TEXT NOT NULL,
+    ramp TEXT NOT NULL,
+    sample_size INTEGER NOT NULL,
+    restart INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS experiments_by_workload
+    ON experiments (workload, workload_args, cluster_size);
+
+CREATE TABLE IF NOT EXISTS runs (
+    experiment TEXT NOT NULL REFERENCES experiments (name),
+    run INTEGER NOT NULL,
+    experiment_type TEXT NOT NULL,
+    seed INTEGER,
+    source_size INTEGER NOT NULL,
+    source_mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (experiment, run, experiment_type)
+);
+
+CREATE TABLE IF NOT EXISTS final_metrics (
+    experiment TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    experiment_type TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    {", ".join(f"{col} REAL" for col in NUMERIC_COLUMNS)},
+    PRIMARY KEY (experiment, run, experiment_type, operation)
+);
+CREATE INDEX IF NOT EXISTS final_metrics_by_operation
+    ON final_metrics (operation, experiment_type);
+
+CREATE TABLE IF NOT EXISTS interval_metrics (
+    experiment TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    experiment_type TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    time REAL NOT NULL,
+    {", ".join(f"{col} REAL" for col in NUMERIC_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS interval_metrics_by_run
+    ON interval_metrics (experiment, run, experiment_type, operation, time);
+"""
+
+
+def connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _ingest_run(
+    conn: sqlite3.Connection,
+    name: str,
+    run: int,
+    exp_type: ExperimentType,
+    seed: Optional[int],
+) -> bool:
+    """Load one run into the store unless it is already up to date."""
+    filepath = f"{get_local_output_dir(name, run, exp_type)}/data/client.txt"
+    if not os.path.exists(filepath):
+        return False
+
+    stat = os.stat(filepath)
+    key = (name, run, str(exp_type))
+    row = conn.execute(
+        "SELECT source_size, source_mtime_ns FROM runs "
+        "WHERE experiment = ? AND run = ? AND experiment_type = ?",
+        key,
+    ).fetchone()
+    if row == (stat.st_size, stat.st_mtime_ns):
+        return False
+
+    for table in ("final_metrics", "interval_metrics"):
+        conn.execute(
+            f"DELETE FROM {table} "
+            "WHERE experiment = ? AND run = ? AND experiment_type = ?",
+            key,
+        )
+
+    columns = ", ".join(NUMERIC_COLUMNS)
+    placeholders = ", ".join("?" * len(NUMERIC_COLUMNS))
+
+    final = cached_frame(filepath, "last", read_last_rows)
+    conn.executemany(
+        f"INSERT INTO final_metrics (experiment, run, experiment_type, "
+        f"operation, {columns}) VALUES (?, ?, ?, ?, {placeholders})",
+        (
+            (*key, op.capitalize(), *values)
+            for op, *values in final[["type", *NUMERIC_COLUMNS]].itertuples(
+                index=False
+            )
+        ),
+    )
+
+    interval = cached_frame(filepath, "frame", read_frame)
+    conn.executemany(
+        f"INSERT INTO interval_metrics (experiment, run, experiment_type, "
+        f"operation, time, {columns}) "
+        f"VALUES (?, ?, ?, ?, ?, {placeholders})",
+        (
+            (*key, op.capitalize(), *values)
+            for op, *values in interval[
+                ["type", "time", *NUMERIC_COLUMNS]
+            ].itertuples(index=False)
+        ),
+    )
+
+    conn.execute(
+        "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+        (*key, seed, stat.st_size, stat.st_mtime_ns),
+    )
+    return True
+
+
+def ingest(name: str, db_path: str = DB_PATH) -> int:
+    """
+    Load the config and every run of an experiment into the store, with the
+    seeds recorded in its journal. Runs whose client.txt did not change
+    since the last ingest are skipped. Returns the number of runs loaded.
+    """
+    config = ExperimentConfig.load(name)
+    journal = Journal.load(name)
+    seeds = journal.seeds() if journal else {}
+    loaded = 0
+    with closing(connect(db_path)) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO experiments VALUES "
+            "(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                config.name,
+                str(config.deployment_type),
+                config.workload,
+                config.workload_args,
+                config.cluster_size,
+                str(config.duration),
+                config.ramp,
+                config.sample_size,
+                int(config.restart),
+            ),
+        )
+        for run in run_numbers(name):
+            for exp_type in ExperimentType:
+                loaded += _ingest_run(
+                    conn, name, run, exp_type, seeds.get(run)
+                )
+
+    print(f"✅ Ingested {loaded} new or changed runs of {name}")
+    return loaded
+
+
+def ingest_all(db_path: str = DB_PATH) -> int:
+    """Ingest every experiment under ./runs that recorded its config."""
+    loaded = 0
+    for path in sorted(glob.glob(config_path("**"), recursive=True)):
+        name = os.path.relpath(os.path.dirname(path), "./runs")
+        loaded += ingest(name, db_path)
+    return loaded
+
+
+def compare(
+    metric: str,
+    workload: Optional[str] = None,
+    workload_args: Optional[str] = None,
+    cluster_size: Optional[int] = None,
+    operation: Optional[str] = None,
+    db_path: str = DB_PATH,
+) -> pd.DataFrame:
+    """
+    Mean of a final metric for baseline and thesis across all stored
+    experiments matching the filters, one row per experiment and operation.
+    """
+    if metric not in NUMERIC_COLUMNS:
+        raise ValueError(f"metric must be one of {NUMERIC_COLUMNS}")
+
+    filters = {
+        "e.workload": workload,
+        "e.workload_args": workload_args,
+        "e.cluster_size": cluster_size,
+        "f.operation": operation,
+    }
+    where = [
+        f"{col} = ?" for col, value in filters.items() if value is not None
+    ]
+    params = [value for value in filters.values() if value is not None]
+
+    query = f"""
+        SELECT
+            e.name AS experiment,
+            e.workload,
+            e.workload_args,
+            e.cluster_size,
+            f.operation,
+            AVG(CASE WHEN f.experiment_type = 'baseline'
+                THEN f.{metric} END) AS baseline,
+            AVG(CASE WHEN f.experiment_type = 'thesis'
+                THEN f.{metric} END) AS thesis,
+            COUNT(DISTINCT f.run) AS runs
+        FROM final_metrics f
+        JOIN experiments e ON e.name = f.experiment
+        {"WHERE " + " AND ".join(where) if where else ""}
+        GROUP BY e.name, f.operation
+        ORDER BY e.workload, e.workload_args, e.cluster_size, f.operation
+    """
+    with closing(connect(db_path)) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+
+    df["change_pct"] = (
+        (df["thesis"] - df["baseline"]) / df["baseline"] * 100
+    ).round(2)
+    return df
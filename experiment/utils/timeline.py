@@ -0,0 +1,214 @@
+import heapq
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from typing import Iterator, Optional
+import pandas as pd
+from .client_data import iter_records, parse_time
+from .cockroach_log import EVENT_PATTERNS, iter_entries, log_files
+from .common import ExperimentType, get_local_output_dir
+
+# Event type of an indexed entry, the first pattern that matches its message
+# wins. Entries matching none are indexed by severity.
+EVENT_TYPES = {
+    **{
+        event: pattern.pattern.decode()
+        for event, pattern in EVENT_PATTERNS.items()
+    },
+    "snapshot": r"snapshot",
+    "lease": r"\blease",
+    "liveness": r"liveness|heartbeat",
+    "election": r"campaign|election",
+    "slow": r"slow |have been waiting|took \d",
+}
+_EVENT_TYPE = re.compile(
+    "|".join(
+        f"(?P<{event}>{pattern})" for event, pattern in EVENT_TYPES.items()
+    )
+)
+SEVERITIES = {"I": "info", "W": "warning", "E": "error", "F": "fatal"}
+
+# Only the first line of a message is indexed, the full entry is read back
+# from its file offset
+MESSAGE_LENGTH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    time REAL NOT NULL,
+    node TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    event TEXT NOT NULL,
+    range_id INTEGER,
+    source TEXT NOT NULL,
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_time ON events (time);
+CREATE INDEX IF NOT EXISTS events_by_type ON events (event, time);
+"""
+
+
+def logs_dir(name: str, run: int, exp_type: ExperimentType) -> str:
+    return f"{get_local_output_dir(name, run, exp_type)}/logs"
+
+
+def node_files(directory: str) -> dict[str, list[str]]:
+    """Log files of every node, one directory per node."""
+    nodes = {}
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        if entry.is_dir():
+            files = log_files(entry.path)
+            if files:
+                nodes[entry.name] = files
+    # Experiments from before every node was downloaded keep a single
+    # node's logs at the top level
+    files = log_files(directory)
+    if files:
+        nodes.setdefault(os.path.basename(directory), files)
+    return nodes
+
+
+def _classify(severity: str, message: str) -> str:
+    match = _EVENT_TYPE.search(message)
+    return match.lastgroup if match else SEVERITIES[severity]
+
+
+def _node_entries(node: str, filepath: str) -> Iterator[dict]:
+    for entry in iter_entries(filepath):
+        entry["node"] = node
+        yield entry
+
+
+def iter_timeline(directory: str) -> Iterator[dict]:
+    """
+    Stream the entries of every node's logs as one timeline.
+
+    Every file is already in time order, so a heap-based k-way merge yields
+    the timeline while holding a single entry per file in memory.
+    """
+    streams = [
+        _node_entries(node, path)
+        for node, files in node_files(directory).items()
+        for path in files
+    ]
+    return heapq.merge(*streams, key=itemgetter("time"))
+
+
+def _file_stats(directory: str) -> list[tuple[str, int, int]]:
+    stats = []
+    for files in node_files(directory).values():
+        for path in files:
+            stat = os.stat(path)
+            stats.append((path, stat.st_size, stat.st_mtime_ns))
+    return sorted(stats)
+
+
+def _index_path(directory: str) -> str:
+    return f"{directory}/timeline.db"
+
+
+def build_index(directory: str, force: bool = False) -> str:
+    """
+    Index the merged timeline of a logs directory by time and event type.
+    The index is rebuilt only when a log file changed.
+    """
+    stats = _file_stats(directory)
+    path = _index_path(directory)
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.executescript(SCHEMA)
+        indexed = conn.execute(
+            "SELECT path, size, mtime_ns FROM files ORDER BY path"
+        ).fetchall()
+        if indexed == stats and not force:
+            return path
+
+        conn.execute("DELETE FROM files")
+        conn.execute("DELETE FROM events")
+        conn.executemany(
+            "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    entry["time"].timestamp(),
+                    entry["node"],
+                    SEVERITIES[entry["severity"]],
+                    _classify(entry["severity"], entry["message"]),
+                    entry["range_id"],
+                    entry["source"],
+                    entry["file"],
+                    entry["offset"],
+                    entry["message"].split("\n", 1)[0][:MESSAGE_LENGTH],
+                )
+                for entry in iter_timeline(directory)
+            ),
+        )
+        conn.executemany("INSERT INTO files VALUES (?, ?, ?)", stats)
+
+    print(f"✅ Indexed the logs of {len(node_files(directory))} nodes")
+    return path
+
+
+def events_near(
+    directory: str,
+    at: datetime,
+    window: float = 5.0,
+    event_type: Optional[str] = None,
+) -> pd.DataFrame:
+    """Indexed events within `window` seconds of `at`, in time order."""
+    path = build_index(directory)
+    center = at.timestamp()
+    query = (
+        "SELECT time, node, severity, event, range_id, source, file, "
+        "offset, message FROM events WHERE time BETWEEN ? AND ?"
+    )
+    params = [center - window, center + window]
+    if event_type:
+        query += " AND event = ?"
+        params.append(event_type)
+    query += " ORDER BY time"
+
+    with closing(sqlite3.connect(path)) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+
+    df.insert(1, "offset_s", (df["time"] - center).round(6))
+    df["time"] = pd.to_datetime(df["time"], unit="s", utc=True).dt.round("us")
+    df["range_id"] = df["range_id"].astype("Int64")
+    return df
+
+
+def restart_time(directory: str) -> Optional[datetime]:
+    """Time of the last node start, the restart of restart experiments."""
+    path = build_index(directory)
+    with closing(sqlite3.connect(path)) as conn:
+        (time,) = conn.execute(
+            "SELECT MAX(time) FROM events WHERE event = 'start'"
+        ).fetchone()
+    if time is None:
+        return None
+    return datetime.fromtimestamp(time, timezone.utc)
+
+
+def client_time(
+    name: str, run: int, exp_type: ExperimentType, elapsed: float
+) -> datetime:
+    """
+    Wall-clock time of a point of the client time series, given in seconds
+    since its first tick like the `time` column of `read_frame`.
+    """
+    filepath = f"{get_local_output_dir(name, run, exp_type)}/data/client.txt"
+    first = next(iter_records(filepath))
+    return parse_time(first["time"]) + timedelta(seconds=elapsed)
+
+
+def read_entry(filepath: str, offset: int) -> str:
+    """Full message of the entry starting at `offset`, continuation included."""
+    entry = next(iter_entries(filepath, offset))
+    return entry["message"]
@@ -0,0 +1,303 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from scipy.stats import t as student_t
+from .cache import cached_frame
+from .client_data import read_frame
+from .common import (
+    EXPERIMENT_TYPE_MAP,
+    ExperimentType,
+    SeriesMode,
+    get_local_output_dir,
+    map_in_parallel,
+    run_numbers,
+)
+from .plotting import PlotJob, plt, render, sns
+
+# Points kept per line, plenty for a figure a few inches wide
+POINTS = 1000
+CONFIDENCE = 0.95
+
+METRIC_LABELS = {
+    "avgt": "At Time",
+    "avgl": "Cumulative",
+    "p50l": "p50",
+    "p95l": "p95",
+    "p99l": "p99",
+    "maxl": "Max",
+    "errs": "Errors",
+}
+LINESTYLES = ["-", "--", ":", "-."]
+
+
+class NoDataError(ValueError):
+    pass
+
+
+@dataclass
+class Source:
+    """
+    Runs plotted as one panel: every run of an experiment, optionally of a
+    single experiment type or a single run.
+    """
+
+    name: str
+    exp_type: Optional[ExperimentType] = None
+    run: Optional[int] = None
+    label: Optional[str] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "Source":
+        """Parse `name[:experiment_type[:run]]`."""
+        name, *rest = spec.split(":")
+        exp_type = ExperimentType(rest[0]) if rest and rest[0] else None
+        run = int(rest[1]) if len(rest) > 1 else None
+        return cls(name, exp_type, run)
+
+    def runs(self) -> list[tuple[str, int, ExperimentType]]:
+        exp_types = [self.exp_type] if self.exp_type else list(ExperimentType)
+        runs = [self.run] if self.run else run_numbers(self.name)
+        return [
+            (self.name, run, exp_type)
+            for exp_type in exp_types
+            for run in runs
+        ]
+
+    def title(self) -> str:
+        if self.label:
+            return self.label
+        title = self.name
+        if self.exp_type:
+            title += f" ({EXPERIMENT_TYPE_MAP[str(self.exp_type)]})"
+        if self.run:
+            title += f" run {self.run}"
+        return title
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets
+    downsampling (Steinarsson, 2013), which preserves the visual shape of a
+    series, its peaks and dips included.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Twice the area of the triangle of the last kept point, every
+        # candidate of this bucket and the average of the next bucket
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def _load_run(
+    name: str, run: int, exp_type: ExperimentType, limit: Optional[float]
+) -> pd.DataFrame:
+    filepath = f"{get_local_output_dir(name, run, exp_type)}/data/client.txt"
+    df = cached_frame(filepath, "frame", read_frame)
+    if limit is not None:
+        df = df[df["time"] < limit]
+    return df.assign(run=f"{exp_type}-{run}")
+
+
+def _downsample(df: pd.DataFrame, metric: str, points: int) -> pd.DataFrame:
+    df = df[["time", metric]].dropna().sort_values("time")
+    x, y = df["time"].to_numpy(), df[metric].to_numpy()
+    kept = lttb(x, y, points)
+    return pd.DataFrame(
+        {"time": x[kept], "value": y[kept], "low": np.nan, "high": np.nan}
+    )
+
+
+def _aggregate(df: pd.DataFrame, metric: str, points: int) -> pd.DataFrame:
+    """
+    Mean across runs with a confidence band, on `points` time bins. Each
+    run contributes the mean of its ticks inside a bin.
+    """
+    df = df[["run", "time", metric]].dropna()
+    width = max(df["time"].max() / points, 1e-9)
+    per_run = (
+        df.assign(bin=(df["time"] // width).astype(np.int64))
+        .groupby(["bin", "run"])[metric]
+        .mean()
+    )
+    stats = per_run.groupby(level="bin").agg(["mean", "std", "count"])
+
+    dof = (stats["count"] - 1).clip(lower=1)
+    margin = student_t.ppf((1 + CONFIDENCE) / 2, dof) * (
+        stats["std"] / np.sqrt(stats["count"])
+    )
+    return pd.DataFrame(
+        {
+            "time": (stats.index.to_numpy() + 0.5) * width,
+            "value": stats["mean"].to_numpy(),
+            "low": (stats["mean"] - margin).to_numpy(),
+            "high": (stats["mean"] + margin).to_numpy(),
+        }
+    )
+
+
+def prepare(
+    sources: list[Source],
+    metrics: tuple[str, ...],
+    operations: Optional[list[str]] = None,
+    limit: Optional[float] = None,
+    points: int = POINTS,
+    mode: SeriesMode = SeriesMode.AUTO,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    The lines of every panel in long format: one row per kept point with
+    the panel, operation and metric it belongs to.
+
+    A panel of a single run is downsampled with LTTB, one of several runs
+    is aggregated into mean-and-band lines unless `mode` says otherwise.
+    Raises NoDataError if no source has a matching run.
+    """
+    mode = SeriesMode(mode)
+    frames = []
+    for source in sources:
+        tasks = [(*run, limit) for run in source.runs()]
+        if not tasks:
+            print(f"⚠️ No runs found for {source.title()}")
+            continue
+        df = pd.concat(map_in_parallel(_load_run, tasks, workers))
+        if operations:
+            df = df[df["type"].isin(operations)]
+
+        aggregate = mode == SeriesMode.BAND or (
+            mode == SeriesMode.AUTO and len(tasks) > 1
+        )
+        for op, df_op in df.groupby("type", sort=False):
+            for metric in metrics:
+                if aggregate:
+                    line = _aggregate(df_op, metric, points)
+                else:
+                    line = _downsample(df_op, metric, points)
+                frames.append(
+                    line.assign(panel=source.title(), type=op, metric=metric)
+                )
+    if not frames:
+        titles = ", ".join(source.title() for source in sources)
+        raise NoDataError(f"No runs or operations to plot [{titles}]")
+    return pd.concat(frames, ignore_index=True)
+
+
+def draw_timeseries(
+    df: pd.DataFrame,
+    title: str,
+    ylabel: str,
+    marks: Optional[dict] = None,
+) -> Figure:
+    """One panel per source, one line per operation and metric."""
+    panels = list(dict.fromkeys(df["panel"]))
+    marks = marks or {}
+
+    with sns.axes_style("whitegrid"), sns.plotting_context(
+        "paper", font_scale=2.0
+    ):
+        fig, axes = plt.subplots(
+            1,
+            len(panels),
+            figsize=(8 * len(panels), 9),
+            sharey=True,
+            squeeze=False,
+        )
+        metrics = list(dict.fromkeys(df["metric"]))
+        multiple_ops = df["type"].nunique() > 1
+
+        for ax, panel in zip(axes[0], panels):
+            df_panel = df[df["panel"] == panel]
+            for (op, metric), line in df_panel.groupby(
+                ["type", "metric"], sort=False
+            ):
+                label = METRIC_LABELS.get(metric, metric)
+                if multiple_ops:
+                    label = f"{op} - {label}"
+                (drawn,) = ax.plot(
+                    line["time"],
+                    line["value"],
+                    label=label,
+                    linestyle=LINESTYLES[
+                        metrics.index(metric) % len(LINESTYLES)
+                    ],
+                    linewidth=2,
+                )
+                if line["low"].notna().any():
+                    ax.fill_between(
+                        line["time"],
+                        line["low"],
+                        line["high"],
+                        color=drawn.get_color(),
+                        alpha=0.2,
+                        linewidth=0,
+                    )
+
+            if marks.get(panel) is not None:
+                ax.axvline(
+                    x=marks[panel],
+                    color="red",
+                    linestyle=":",
+                    linewidth=2,
+                    label="Ramp/Warm-Up End",
+                )
+            ax.set_title(panel)
+            ax.set_xlabel("Time (s)")
+            ax.set_ylabel(ylabel)
+            ax.grid(True)
+            ax.legend()
+
+        fig.suptitle(title, fontsize=20)
+        fig.tight_layout(rect=[0, 0, 1, 0.95])
+    return fig
+
+
+def run(
+    sources: list[Source],
+    output: str,
+    metrics: tuple[str, ...] = ("avgt",),
+    operations: Optional[list[str]] = None,
+    limit: Optional[float] = None,
+    points: int = POINTS,
+    mode: SeriesMode = SeriesMode.AUTO,
+    title: str = "Throughput over Time",
+    ylabel: str = "Throughput (ops/s)",
+    marks: Optional[dict] = None,
+    workers: int = 1,
+    dpi: int = 300,
+) -> pd.DataFrame:
+    """Plot the time series of the sources side by side to `output`.pdf."""
+    df = prepare(sources, metrics, operations, limit, points, mode, workers)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    render(
+        [
+            PlotJob(
+                draw_timeseries,
+                output,
+                df,
+                {"title": title, "ylabel": ylabel, "marks": marks},
+                dpi=dpi,
+            )
+        ]
+    )
+    return df
@@ -1,162 +1,142 @@
+import math
 import os
-import seaborn as sns
-import matplotlib.pyplot as plt
-import json
 import pandas as pd
-
-
-def _load_data(filepath: str, limit: int) -> pd.DataFrame:
-    with open(filepath, "r") as f:
-        raw_lines = f.readlines()
-
-    lines = [
-        line.strip()
-        for line in raw_lines
-        if line.strip().startswith("{") and line.strip().endswith("}")
-    ]
-    json_array = "[" + ",".join(lines) + "]"
-    data = json.loads(json_array)
-
-    df = pd.DataFrame(data)
-    df["time"] = pd.to_datetime(df["time"])
-    start_time = df["time"].min()
-    df["time"] = (df["time"] - start_time).dt.total_seconds()
-    return df[df["time"] < limit]
-
-
-def _plot_throughput_comparison(
-    df1,
-    df2,
-    ax1_title,
-    ax2_title,
-    y_label,
-    vline,
-    suptitle,
-    save_path=None,
-    group_by_type=False,
-):
-    sns.set(style="whitegrid", context="paper")
-    sns.set_context("paper", font_scale=2.0)
-    fig, axes = plt.subplots(1, 2, figsize=(16, 9), sharey=True)
-
-    def _plot(ax, df, title, vline):
-        if group_by_type and "type" in df.columns:
-            for op_type in df["type"].unique():
-                subset = df[df["type"] == op_type]
-                sns.lineplot(
-                    data=subset,
-                    x="time",
-                    y="avgt",
-                    ax=ax,
-                    label=f"{op_type} - At Time",
-                    linewidth=2,
-                )
-                sns.lineplot(
-                    data=subset,
-                    x="time",
-                    y="avgl",
-                    ax=ax,
-                    label=f"{op_type} - Cumulative",
-                    linestyle="--",
-                    linewidth=2,
-                )
-        else:
-            sns.lineplot(
-                data=df,
-                x="time",
-                y="avgt",
-                label="Avg Throughput",
-                ax=ax,
-                linewidth=3,
-            )
-            sns.lineplot(
-                data=df,
-                x="time",
-                y="avgl",
-                label="Cumulative Throughput",
-                color="orange",
-                linestyle="--",
-                linewidth=3,
-                ax=ax,
-            )
-
-        if vline is not None:
-            ax.axvline(
-                x=vline,
-                color="red",
-                linestyle=":",
-                linewidth=2,
-                label="Ramp/Warm-Up End",
-            )
-        ax.set_title(title)
-        ax.set_xlabel("Time (s)")
-        ax.set_ylabel(y_label)
-        ax.grid(True)
-        ax.legend()
-
-    _plot(axes[0], df1, ax1_title, None)
-    _plot(axes[1], df2, ax2_title, vline)
-
-    plt.suptitle(suptitle, fontsize=20)
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    if save_path:
-        os.makedirs(save_path, exist_ok=True)
-        plt.savefig(
-            f"{save_path}/warmup.pdf",
-            format="pdf",
-            dpi=500,
-            bbox_inches="tight",
-        )
-    else:
-        plt.show()
+from utils import timeseries
+from utils.cache import cached_frame
+from utils.client_data import read_frame
+from utils.common import (
+    ExperimentType,
+    convert_duration,
+    get_local_output_dir,
+    map_in_parallel,
+)
+from utils.experiment.models import ExperimentConfig
+from utils.experiment.ramps import save_ramp
+from utils.steady_state import steady_state_start
+from utils.timeseries import Source
+
+# Detected warm-ups are rounded up to a multiple of this many seconds
+RAMP_GRANULARITY = 10
 
 
 def compare_ycsb_warmup():
-    df_no_ramp = _load_data(
-        "./runs/ycsb-local-warmup-without-ramp/run-1/experiment-baseline/data/client.txt",
-        limit=800,
+    without_ramp = Source(
+        "ycsb-local-warmup-without-ramp",
+        ExperimentType.BASELINE,
+        1,
+        "Without Ramp-Up",
     )
-    df_with_ramp = _load_data(
-        "./runs/ycsb-local-warmup-with-ramp/run-1/experiment-baseline/data/client.txt",
-        limit=800,
+    with_ramp = Source(
+        "ycsb-local-warmup-with-ramp",
+        ExperimentType.BASELINE,
+        1,
+        "With Ramp-Up",
     )
 
-    _plot_throughput_comparison(
-        df1=df_no_ramp,
-        df2=df_with_ramp,
-        ax1_title="Without Ramp-Up",
-        ax2_title="With Ramp-Up",
-        y_label="Throughput (ops/s)",
-        vline=400,
-        suptitle="YCSB Throughput Comparison: With and Without Ramp-Up",
-        save_path="./runs/ycsb-local-warmup-with-ramp/results",
+    timeseries.run(
+        [without_ramp, with_ramp],
+        "./runs/ycsb-local-warmup-with-ramp/results/warmup",
+        metrics=("avgt", "avgl"),
+        limit=800,
+        title="YCSB Throughput Comparison: With and Without Ramp-Up",
+        ylabel="Throughput (ops/s)",
+        marks={with_ramp.title(): 400},
+        dpi=500,
     )
 
 
 def compare_tpcc_warmup():
-    df_no_ramp = _load_data(
-        "./runs/tpcc-local-warmup-without-ramp/run-1/experiment-baseline/data/client.txt",
-        limit=300,
+    without_ramp = Source(
+        "tpcc-local-warmup-without-ramp",
+        ExperimentType.BASELINE,
+        1,
+        "Without Ramp-Up",
+    )
+    with_ramp = Source(
+        "tpcc-local-warmup-with-ramp",
+        ExperimentType.BASELINE,
+        1,
+        "With Ramp-Up",
     )
 
-    df_ramp = _load_data(
-        "./runs/tpcc-local-warmup-with-ramp/run-1/experiment-baseline/data/client.txt",
+    timeseries.run(
+        [without_ramp, with_ramp],
+        "./runs/tpcc-local-warmup-with-ramp/results/warmup",
+        metrics=("avgt", "avgl"),
+        operations=["newOrder", "orderStatus"],
         limit=300,
+        title="TPC-C tpmC Comparison: With and Without Ramp-Up",
+        ylabel="tpmC",
+        marks={with_ramp.title(): 180},
+        dpi=500,
     )
 
-    # Keep only relevant types
-    op_filter = ["newOrder", "orderStatus"]
-    df_ramp = df_ramp[df_ramp["type"].isin(op_filter)]
-    df_no_ramp = df_no_ramp[df_no_ramp["type"].isin(op_filter)]
-
-    _plot_throughput_comparison(
-        df1=df_no_ramp,
-        df2=df_ramp,
-        ax1_title="Without Ramp-Up",
-        ax2_title="With Ramp-Up",
-        y_label="tpmC",
-        vline=180,
-        suptitle="TPC-C tpmC Comparison: With and Without Ramp-Up",
-        save_path="./runs/tpcc-local-warmup-with-ramp/results",
-        group_by_type=True,
+
+def _detect_run(name: str, run: int, exp_type: ExperimentType) -> pd.DataFrame:
+    local_output_dir = get_local_output_dir(name, run, exp_type)
+    df = cached_frame(
+        f"{local_output_dir}/data/client.txt", "frame", read_frame
+    )
+
+    return pd.DataFrame(
+        [
+            {
+                "experiment_type": str(exp_type),
+                "type": op,
+                "run": run,
+                "warmup": steady_state_start(df_op),
+            }
+            for op, df_op in df.groupby("type", sort=False)
+        ]
+    )
+
+
+def detect_warmup(name: str, sample_size: int, workers: int = 1) -> int:
+    """
+    Measure the warm-up of every operation in every run of an experiment
+    and record the resulting ramp for its workload and cluster size.
+
+    Warm-up is measured from the first tick, so the experiment should be
+    run with `--ramp 0s`. The ramp covers the 90th percentile across runs
+    of the slowest operation, rounded up to RAMP_GRANULARITY seconds.
+    """
+    config = ExperimentConfig.load(name)
+    if convert_duration(config.ramp) != 0:
+        print(
+            f"⚠️ {name} ran with a ramp of {config.ramp}, the detected "
+            "warm-up includes it"
+        )
+
+    tasks = [
+        (name, i, exp_type)
+        for exp_type in ExperimentType
+        for i in range(1, sample_size + 1)
+    ]
+    df = pd.concat(map_in_parallel(_detect_run, tasks, workers))
+
+    warmups = df.groupby(["experiment_type", "type"])["warmup"]
+    summary = warmups.describe(percentiles=[0.5, 0.9])
+    ramp = int(
+        math.ceil(warmups.quantile(0.9).max() / RAMP_GRANULARITY)
+        * RAMP_GRANULARITY
+    )
+
+    output_dir = f"./runs/{name}/results"
+    os.makedirs(output_dir, exist_ok=True)
+    summary.to_csv(f"{output_dir}/warmup.csv")
+    print(summary.to_string())
+
+    save_ramp(
+        config.deployment_type,
+        config.workload,
+        config.workload_args,
+        config.cluster_size,
+        ramp,
+        name,
+    )
+    print(
+        f"✅ Detected ramp of {ramp}s for {config.workload} "
+        f"{config.workload_args} on {config.cluster_size} nodes "
+        f"({config.deployment_type})"
     )
+    return ramp